@@ -28,24 +28,140 @@
 #
 # --------------------------------------------------------------
 
+import atexit
 import json
 import multiprocessing
 import os
 import os.path
-import re
 import shutil
 import subprocess
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+
 from pathlib import Path
 from typing  import Final
 
+# Потоковый парсер JSON (опционально):
+#   при наличии ijson элементы result.json читаются по одному,
+#   без материализации всего списка в памяти.
+#   Бэкенд yajl2_c существенно быстрее чистопитоновского, если доступен.
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+# Быстрый JSON-парсер (опционально):
+#   если ijson нет, а result.json помещается в память, orjson.loads
+#   в разы быстрее стандартного json.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 
 # --------------------------------------------------------------
 # Параметры PVS
 #
 
+# Отображение стандартов
+#
+# PVS:
+#   C  : "c90", "c99", "c11", "c17", "c23";
+#   C++: "c++98", "c++03", "c++11", "c++14", "c++17", "c++20", "c++23", "c++26".
+# По умолчанию для языка `C` устанавливается значение `c99`, для `C++` - `c++17`
+#
+_STD_MAP : Final[dict] = {
+    #
+    # C
+    #
+
+    'c90'           : 'c90', # gcc, clang, lcc
+    'c89'           : 'c90', # gcc, clang, lcc
+    'iso9899:1990'  : 'c90', # gcc, clang, lcc
+    'iso9899:199409': 'c90', # gcc, clang, lcc
+    'gnu90'         : 'c90', # gcc, clang, lcc
+    'gnu89'         : 'c90', # gcc, clang, lcc
+
+    'c99'           : 'c99', # gcc, clang, lcc
+    'c9x'           : 'c99', # gcc       , lcc
+    'iso9899:1999'  : 'c99', # gcc, clang, lcc
+    'iso9899:199x'  : 'c99', # gcc
+    'gnu99'         : 'c99', # gcc, clang, lcc
+    'gnu9x'         : 'c99', # gcc       , lcc
+
+    'c11'           : 'c11', # gcc, clang, lcc
+    'c1x'           : 'c11', # gcc       , lcc
+    'iso9899:2011'  : 'c11', # gcc, clang, lcc
+    'gnu11'         : 'c11', # gcc, clang, lcc
+    'gnu1x'         : 'c11', # gcc       , lcc
+
+    'c17'           : 'c17', # gcc, clang, lcc
+    'c18'           : 'c17', # gcc       , lcc
+    'iso9899:2017'  : 'c17', # gcc, clang, lcc
+    'iso9899:2018'  : 'c17', # gcc       , lcc
+    'gnu17'         : 'c17', # gcc, clang, lcc
+    'gnu18'         : 'c17', # gcc       , lcc
+
+    'c23'           : 'c23', # gcc       , lcc
+    'c2x'           : 'c23', # gcc       , lcc
+    'iso9899:2024'  : 'c23', # gcc       , lcc
+    'gnu23'         : 'c23', # gcc       , lcc
+    'gnu2x'         : 'c23', # gcc       , lcc
+
+    # 'c2y'   - The next version of the ISO C standard, still under development. The support for this version is experimental and incomplete.
+    # 'gnu2y' - The next version of the ISO C standard, still under development, plus GNU extensions. The support for this version is experimental and incomplete.
+
+    #
+    # C++
+    #
+
+    'c++98'         : 'c++98', # gcc, clang, lcc
+    'gnu++98'       : 'c++98', # gcc, clang, lcc
+
+    'c++03'         : 'c++03', # gcc, clang, lcc
+    'gnu++03'       : 'c++03', # gcc, clang, lcc
+
+    'c++11'         : 'c++11', # gcc, clang, lcc
+    'c++0x'         : 'c++11', # gcc       , lcc
+    'gnu++11'       : 'c++11', # gcc, clang, lcc
+    'gnu++0x'       : 'c++11', # gcc       , lcc
+
+    'c++14'         : 'c++14', # gcc, clang, lcc
+    'c++1y'         : 'c++14', # gcc       , lcc
+    'gnu++14'       : 'c++14', # gcc, clang, lcc
+    'gnu++1y'       : 'c++14', # gcc       , lcc
+
+    'c++17'         : 'c++17', # gcc, clang, lcc
+    'c++1z'         : 'c++17', # gcc       , lcc
+    'gnu++17'       : 'c++17', # gcc, clang, lcc
+    'gnu++1z'       : 'c++17', # gcc       , lcc
+
+    'c++20'         : 'c++20', # gcc, clang, lcc
+    'c++2a'         : 'c++20', # gcc       , lcc
+    'gnu++20'       : 'c++20', # gcc, clang, lcc
+    'gnu++2a'       : 'c++20', # gcc       , lcc
+
+    'c++23'         : 'c++23', # gcc, clang, lcc
+    'c++2b'         : 'c++23', # gcc       , lcc
+    'gnu++23'       : 'c++23', # gcc, clang, lcc
+    'gnu++2b'       : 'c++23', # gcc       , lcc
+
+    'c++2c'         : 'c++26', # gcc, clang
+    'c++26'         : 'c++26', # gcc
+    'gnu++2c'       : 'c++26', # gcc, clang
+    'gnu++26'       : 'c++26', # gcc
+}
+
+# Компиляторы, препроцессор которых pvs-studio использует напрямую.
+_PP_PASSTHROUGH : Final[frozenset] = frozenset(('gcc', 'clang'))
+
+
 class PVS:
     # Отображение языков программирования
     # PVS:
@@ -55,100 +171,11 @@ class PVS:
         'c++': 'C++'
     }
 
-    # Отображение стандартов
-    #
-    # PVS:
-    #   C  : "c90", "c99", "c11", "c17", "c23";
-    #   C++: "c++98", "c++03", "c++11", "c++14", "c++17", "c++20", "c++23", "c++26".
-    # По умолчанию для языка `C` устанавливается значение `c99`, для `C++` - `c++17`
-    #
-    map_std_from_compiler : Final[dict] = {
-        #
-        # C
-        #
-
-        'c90'           : 'c90', # gcc, clang, lcc
-        'c89'           : 'c90', # gcc, clang, lcc
-        'iso9899:1990'  : 'c90', # gcc, clang, lcc
-        'iso9899:199409': 'c90', # gcc, clang, lcc
-        'gnu90'         : 'c90', # gcc, clang, lcc
-        'gnu89'         : 'c90', # gcc, clang, lcc
-
-        'c99'           : 'c99', # gcc, clang, lcc
-        'c9x'           : 'c99', # gcc       , lcc
-        'iso9899:1999'  : 'c99', # gcc, clang, lcc
-        'iso9899:199x'  : 'c99', # gcc
-        'gnu99'         : 'c99', # gcc, clang, lcc
-        'gnu9x'         : 'c99', # gcc       , lcc
-
-        'c11'           : 'c11', # gcc, clang, lcc
-        'c1x'           : 'c11', # gcc       , lcc
-        'iso9899:2011'  : 'c11', # gcc, clang, lcc
-        'gnu11'         : 'c11', # gcc, clang, lcc
-        'gnu1x'         : 'c11', # gcc       , lcc
-
-        'c17'           : 'c17', # gcc, clang, lcc
-        'c18'           : 'c17', # gcc       , lcc
-        'iso9899:2017'  : 'c17', # gcc, clang, lcc
-        'iso9899:2018'  : 'c17', # gcc       , lcc
-        'gnu17'         : 'c17', # gcc, clang, lcc
-        'gnu18'         : 'c17', # gcc       , lcc
-
-        'c23'           : 'c23', # gcc       , lcc
-        'c2x'           : 'c23', # gcc       , lcc
-        'iso9899:2024'  : 'c23', # gcc       , lcc
-        'gnu23'         : 'c23', # gcc       , lcc
-        'gnu2x'         : 'c23', # gcc       , lcc
-
-        # 'c2y'   - The next version of the ISO C standard, still under development. The support for this version is experimental and incomplete.
-        # 'gnu2y' - The next version of the ISO C standard, still under development, plus GNU extensions. The support for this version is experimental and incomplete.
-
-        #
-        # C++
-        #
-
-        'c++98'         : 'c++98', # gcc, clang, lcc
-        'gnu++98'       : 'c++98', # gcc, clang, lcc
-
-        'c++03'         : 'c++03', # gcc, clang, lcc
-        'gnu++03'       : 'c++03', # gcc, clang, lcc
-
-        'c++11'         : 'c++11', # gcc, clang, lcc
-        'c++0x'         : 'c++11', # gcc       , lcc
-        'gnu++11'       : 'c++11', # gcc, clang, lcc
-        'gnu++0x'       : 'c++11', # gcc       , lcc
-
-        'c++14'         : 'c++14', # gcc, clang, lcc
-        'c++1y'         : 'c++14', # gcc       , lcc
-        'gnu++14'       : 'c++14', # gcc, clang, lcc
-        'gnu++1y'       : 'c++14', # gcc       , lcc
-
-        'c++17'         : 'c++17', # gcc, clang, lcc
-        'c++1z'         : 'c++17', # gcc       , lcc
-        'gnu++17'       : 'c++17', # gcc, clang, lcc
-        'gnu++1z'       : 'c++17', # gcc       , lcc
-
-        'c++20'         : 'c++20', # gcc, clang, lcc
-        'c++2a'         : 'c++20', # gcc       , lcc
-        'gnu++20'       : 'c++20', # gcc, clang, lcc
-        'gnu++2a'       : 'c++20', # gcc       , lcc
-
-        'c++23'         : 'c++23', # gcc, clang, lcc
-        'c++2b'         : 'c++23', # gcc       , lcc
-        'gnu++23'       : 'c++23', # gcc, clang, lcc
-        'gnu++2b'       : 'c++23', # gcc       , lcc
-
-        'c++2c'         : 'c++26', # gcc, clang
-        'c++26'         : 'c++26', # gcc
-        'gnu++2c'       : 'c++26', # gcc, clang
-        'gnu++26'       : 'c++26', # gcc
-    }
-
     # Маппинг стандартов
     @staticmethod
     def map_std(std):
         # Таблица маппинга
-        return PVS.map_std_from_compiler.get(std)
+        return _STD_MAP.get(std)
 
     # Маппинг имени языка программирования
     @staticmethod
@@ -163,7 +190,7 @@ class PVS:
     @staticmethod
     def map_preprocessor(comp_id, comp_like):
         for id in (comp_id, comp_like):
-            if id in ['gcc', 'clang']:
+            if id in _PP_PASSTHROUGH:
                 return id
             elif id == 'lcc':
                 # TODO: Надо тестировать
@@ -171,11 +198,104 @@ class PVS:
         return None
 
 
+# --------------------------------------------------------------
+# Элементы обработки
+#
+
+# Колоночное (SoA) хранение элементов обработки.
+#
+# Вложенные dict из result.json на больших сборках дают миллионы мелких
+# PyObject (заголовки dict, ключи, обертки). Вместо этого нужные поля
+# складываются в параллельные списки: на элемент остается по одной строке
+# в каждой колонке, а обработчик адресует элементы индексом.
+class WorkItems:
+    __slots__ = (
+        'preprocessed_file',
+        'source_file'      ,
+        'compiler_id'      ,
+        'compiler_like'    ,
+        'lang'             ,
+        'standard'         ,
+        'cwd'              ,
+    )
+
+    def __init__(self, items):
+        for name in WorkItems.__slots__:
+            setattr(self, name, [])
+        for cc in items:
+            self.append(cc)
+
+    def __len__(self):
+        return len(self.preprocessed_file)
+
+    def append(self, cc):
+        command  = cc['command']
+        compiler = command['compiler']
+        metadata = cc['source_metadata']
+        # Интернирование: идентификаторы компиляторов, языки и стандарты
+        # имеют единицы уникальных значений на всю сборку, cwd сильно
+        # повторяется по подкаталогам. Вместо свежей строки на каждый
+        # элемент JSON-парсинга - общий объект; заодно ускоряются
+        # словарные запросы map_std/map_lang (сравнение по указателю).
+        intern = sys.intern
+        self.preprocessed_file.append(cc['preprocessed_file'])
+        self.source_file      .append(cc['source_file'])
+        self.compiler_id      .append(intern(compiler.get('id', '')))
+        self.compiler_like    .append(intern(compiler.get('like', '')) or None)
+        self.lang             .append(intern(metadata['lang']))
+        self.standard         .append(intern(metadata['standard']))
+        self.cwd              .append(intern(command['cwd']))
+
+    # Переупорядочивание всех колонок по списку индексов
+    def reorder(self, order):
+        for name in WorkItems.__slots__:
+            col = getattr(self, name)
+            setattr(self, name, [col[i] for i in order])
+
+
+
 # --------------------------------------------------------------
 # Работа
 #
 
+# Экземпляр приложения, наследуемый воркерами через fork (см. main)
+_APP = None
+
+def _process_task(idxs):
+    for idx in idxs:
+        _APP.processing_index(idx)
+
+def _worker_init():
+    _APP.worker_init()
+
+
 class BuildTraceAnalyzerPVS:
+    # Константы путей внутри chroot (с '/' в конце - для конкатенации строк)
+    __pvs_in_dir  : Final[str] = '/pvs/'
+    __pvs_out_dir : Final[str] = '/pvs/result/'
+
+    # Порог "мелкого" препроцессированного файла и размер пакета
+    # при группировке мелких элементов в одно задание пула (см. main)
+    __batch_size_threshold : Final[int] = 64 * 1024
+    __batch_max            : Final[int] = 32
+
+    # Статическая часть аргументов pvs-studio, одинаковая для всех элементов
+    #
+    # TODO:
+    #   '--exclude-path=/opt/mcst/lcc-home/' - временная заглушка для
+    #   отключения проверки путей /opt/mcst/lcc-home/ - это должен быть
+    #   системный путь.
+    #
+    #   Похоже, что средствами параметров pvs-studio не применяя --exclude-path
+    #   не реализовать поведение, как для системных определений на x86
+    __static_pvs_args : Final[tuple] = (
+        '--platform=linux64',
+        '--new-output-format=yes',
+        '--disable-ms-extensions=yes',
+        '--exclude-path=/opt/mcst/lcc-home/',
+    )
+
+
     def __split_args(self, args):
         try:
             idx = args.index('--')
@@ -184,40 +304,177 @@ class BuildTraceAnalyzerPVS:
             return ([], args)
 
     def __get_parallel(self, args):
+        # Формат тривиален - достаточно проверки префикса, regex не нужен.
         for arg in args:
-            if (mo := re.search(r"^\-\-parallel=(?P<parallel>\d+)$", arg)):
-                parallel = int(mo.group('parallel'))
-                return max(parallel, 1)
+            if arg.startswith('--parallel='):
+                try:
+                    return max(int(arg[len('--parallel='):]), 1)
+                except ValueError:
+                    pass
         return 1
 
 
+    # Оценка памяти на один процесс PVS (МБ).
+    # Переопределяется переменной окружения BUILD_TRACER_PVS_MEM_MB.
+    __pvs_mem_mb_default : Final[int] = 512
+
+    # Чтение MemAvailable из /proc/meminfo (значение в кБ), МБ на выходе.
+    #   Может вернуть None, если прочитать не удалось.
+    @staticmethod
+    def __get_mem_available_mb():
+        try:
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+
+    # Ограничение параллелизма по числу ядер и доступной памяти:
+    # каждый процесс PVS может потреблять сотни МБ, и запрошенный --parallel
+    # на машинах с ограниченной памятью приводит к OOM.
+    def __limit_parallel(self, parallel):
+        per_worker_mb = max(int(os.environ.get('BUILD_TRACER_PVS_MEM_MB', BuildTraceAnalyzerPVS.__pvs_mem_mb_default)), 1)
+
+        limit = multiprocessing.cpu_count()
+        if (avail_mb := BuildTraceAnalyzerPVS.__get_mem_available_mb()) is not None:
+            limit = min(limit, max(avail_mb // per_worker_mb, 1))
+
+        if parallel > limit:
+            self.__print("WARNING: parallel limited: {} -> {}".format(parallel, limit))
+            parallel = limit
+        return parallel
+
+
     def __init__(self):
+        # Состояние, нужное __print, инициализируется до первого вызова:
+        # печать используется уже при разборе аргументов и в __limit_parallel.
+        self.__parallel   = 1
+        # Буфер вывода (создается лениво, у каждого процесса свой)
+        self.__out_buffer = None
+        self.__out_pid    = None
+
+        # Постоянный воркер 'chexec --serve' внутри chroot
+        # (создается лениво, у каждого процесса свой)
+        self.__chexec_server       = None
+        self.__chexec_server_pid   = None
+        self.__chexec_serve_broken = False
+
         if len(sys.argv) < 3:
             self.__print("Usage: build-tracer-analyzer-pvs.py /path/to/source/dir /path/to/result/dir [--parallel=N --] [pvs-studio args...]")
             sys.exit(1)
 
         self.__source_dir : Final[Path] = Path(sys.argv[1])
         self.__result_dir : Final[Path] = Path(sys.argv[2])
+
+        # Строковые формы горячих путей: на каждый элемент обработки
+        # os.path.join по готовым строкам дешевле арифметики Path
+        # (без аллокаций PurePath), а subprocess получает str сразу,
+        # без повторной стрингификации аргументов.
+        self.__root_str   : Final[str] = str(self.__source_dir / 'root')
+        self.__result_str : Final[str] = str(self.__result_dir)
         ( self.__args, self.__pvs_studio_external_args ) = self.__split_args(sys.argv[3:])
         self.__parallel = self.__get_parallel(self.__args)
+        self.__parallel = self.__limit_parallel(self.__parallel)
+
+        # Кеш уже созданных каталогов (см. __ensure_dir)
+        self.__mkdir_cache = set()
+
+        # Принудительный пересчет элементов с актуальным результатом
+        self.__force : Final[bool] = bool(os.environ.get('BUILD_TRACER_PVS_FORCE'))
 
 
     def main(self):
+        global _APP
+
         self.__prepare_env()
-        input_json = self.__read_result_json()
+
+        # Колонки элементов хранятся в родителе: форкнутые воркеры получают
+        # их "бесплатно" через копирование при записи, а через pipe
+        # передаются только целочисленные индексы (без pickle словарей).
+        self.__items = WorkItems(self.__read_result_json())
+        n = len(self.__items)
 
         if self.__parallel > 1:
-            with multiprocessing.Pool(processes=self.__parallel) as pool:
-                pool.map(self.processing_item, input_json)
+            # LPT-планирование: самые крупные единицы трансляции идут
+            # первыми - долгие задания не остаются на конец и не
+            # растягивают "хвост" параллельной обработки.
+            pvs_root = os.path.join(self.__root_str, 'pvs')
+
+            def item_size(idx):
+                try:
+                    return os.path.getsize(os.path.join(pvs_root, self.__items.preprocessed_file[idx]))
+                except OSError:
+                    return 0
+
+            sizes = [ item_size(idx) for idx in range(n) ]
+            order = sorted(range(n), key=sizes.__getitem__, reverse=True)
+            self.__items.reorder(order)
+            sizes.sort(reverse=True)
+
+            # Группировка мелких единиц трансляции в пакеты:
+            # pvs-studio в этом режиме анализирует один i-файл за запуск,
+            # поэтому пакет - это единица диспетчеризации пула: фиксированная
+            # стоимость передачи задания и повторного прогрева амортизируется
+            # на несколько элементов, обрабатываемых одним chexec-сервером.
+            tasks = []
+            batch = []
+            for idx in range(n):
+                if sizes[idx] >= BuildTraceAnalyzerPVS.__batch_size_threshold:
+                    tasks.append((idx,))
+                else:
+                    batch.append(idx)
+                    if len(batch) >= BuildTraceAnalyzerPVS.__batch_max:
+                        tasks.append(tuple(batch))
+                        batch = []
+            if batch:
+                tasks.append(tuple(batch))
+
+            _APP = self
+            chunksize = max(1, len(tasks) // (self.__parallel * 4))
+            # ProcessPoolExecutor с initializer: каждый воркер прогревает
+            # буфер вывода и chexec-сервер до получения первого задания,
+            # а не в счет времени первого элемента. fork-контекст
+            # сохраняет наследование колонок элементов без pickle.
+            with ProcessPoolExecutor(
+                max_workers=self.__parallel,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_worker_init
+            ) as executor:
+                for _ in executor.map(_process_task, tasks, chunksize=chunksize):
+                    pass
         else:
-            for cc in input_json:
-                self.processing_item(cc)
+            for idx in range(n):
+                self.processing_index(idx)
+
+
+    # --------------
+    # Буферизованный вывод
+    #
+    # В параллельном режиме stdout обычно pipe к коллектору логов;
+    # flush на каждой строке резко снижает пропускную способность.
+    # Буфер сбрасывается по границам элементов обработки и при завершении.
+    def __get_out_buffer(self):
+        if self.__out_buffer is None or self.__out_pid != os.getpid():
+            # После fork буфер пересоздается: унаследованный объект
+            # разделял бы позицию с родителем.
+            sys.stdout.flush()
+            self.__out_buffer = os.fdopen(os.dup(sys.stdout.fileno()), 'wb', 65536)
+            self.__out_pid    = os.getpid()
+            atexit.register(self.__flush_out)
+        return self.__out_buffer
+
+    def __flush_out(self):
+        if self.__out_buffer is not None and self.__out_pid == os.getpid():
+            self.__out_buffer.flush()
 
 
     # --------------
     # Печать строки вывода
     #
-    def __print(self, *objects, sep=' ', end='\n', flush=True):
+    def __print(self, *objects, sep=' ', end='\n', flush=False):
         s = ''
         if self.__parallel > 1:
             s += '{:7}:'.format(os.getpid())
@@ -225,9 +482,173 @@ class BuildTraceAnalyzerPVS:
                 s += sep
         s += sep.join(str(item) for item in objects)
         s += end
-        sys.stdout.write(s)
+        buf = self.__get_out_buffer()
+        buf.write(s.encode())
         if flush:
-            sys.stdout.flush()
+            buf.flush()
+
+
+    # --------------
+    # Создание каталога с кешированием уже созданных путей
+    #
+    # Многие элементы обработки делят родительские каталоги: без кеша на
+    # каждый элемент уходит цепочка stat+mkdir. После fork каждый воркер
+    # имеет свою копию кеша - это допустимо, mkdir идемпотентен.
+    def __ensure_dir(self, path, mode=0o755):
+        key = str(path)
+        if key in self.__mkdir_cache:
+            return
+        os.makedirs(path, mode=mode, exist_ok=True)
+        self.__mkdir_cache.add(key)
+
+
+    # --------------
+    # Потоковая перекачка stdout дочернего процесса в собственный stdout
+    #
+    # Чтение бинарными блоками: без TextIOWrapper-декодирования и повторного
+    # кодирования каждой строки. В параллельном режиме к строкам добавляется
+    # префикс pid на уровне байтов.
+    def __stream_output(self, fd):
+        # Сброс буферов ДО прямой записи в дескриптор
+        self.__flush_out()
+        sys.stdout.flush()
+        out_fd = sys.stdout.fileno()
+
+        pid_prefix = None
+        if self.__parallel > 1:
+            pid_prefix = '{:7}: '.format(os.getpid()).encode()
+
+        tail = b''
+        while (chunk := os.read(fd, 65536)):
+            if pid_prefix is None:
+                os.write(out_fd, chunk)
+                continue
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            if lines:
+                os.write(out_fd, b''.join(pid_prefix + l + b'\n' for l in lines))
+        if tail:
+            os.write(out_fd, (pid_prefix if pid_prefix is not None else b'') + tail + b'\n')
+
+
+    # --------------
+    # Постоянный воркер внутри chroot
+    #
+    # Цепочка chroot -> chexec -> pvs-studio на каждый элемент - это
+    # несколько exec и инициализаций на запуск. Вместо этого каждый
+    # процесс-воркер держит один долгоживущий 'chexec --serve' внутри
+    # chroot и передает ему задания через stdin (поля через '\0',
+    # задание завершается пустым полем). chexec сообщает код возврата
+    # строкой 'CHEXEC: status=<код>' в общем потоке вывода; перед ней
+    # сервер печатает '\n', чтобы статус не склеился с выводом команды,
+    # не завершенным переводом строки.
+    # Если режим --serve недоступен (старый chexec), происходит откат
+    # к одиночному запуску цепочки.
+
+    __serve_status_prefix : Final[bytes] = b'CHEXEC: status='
+
+    def __get_chexec_server(self):
+        if self.__chexec_server is not None and self.__chexec_server_pid == os.getpid():
+            return self.__chexec_server
+
+        # Унаследованный после fork объект сервера принадлежит родителю
+        self.__chexec_server = None
+
+        if self.__chexec_serve_broken:
+            return None
+
+        try:
+            proc = subprocess.Popen(
+                [ 'chroot', self.__root_str, '/pvs/bin/chexec', '--serve' ],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                close_fds=False
+            )
+        except OSError as e:
+            self.__print("WARNING: can't start chexec server:", e, flush=True)
+            self.__chexec_serve_broken = True
+            return None
+
+        self.__chexec_server     = proc
+        self.__chexec_server_pid = os.getpid()
+        atexit.register(self.__shutdown_chexec_server)
+        return proc
+
+
+    def __shutdown_chexec_server(self):
+        if self.__chexec_server is not None and self.__chexec_server_pid == os.getpid():
+            try:
+                self.__chexec_server.stdin.close()
+                self.__chexec_server.wait(timeout=10)
+            except Exception:
+                self.__chexec_server.kill()
+            self.__chexec_server = None
+
+
+    # Передача задания серверу.
+    #   Возвращает код возврата команды или None, если сервер не работает.
+    def __submit_chexec_job(self, server, cwd, args):
+        try:
+            server.stdin.write(b'\x00'.join(str(a).encode() for a in (cwd, *args)) + b'\x00\x00')
+            server.stdin.flush()
+        except OSError:
+            return None
+
+        # Вывод команды транслируется до статусной строки
+        self.__flush_out()
+        sys.stdout.flush()
+        out_fd = sys.stdout.fileno()
+
+        pid_prefix = b''
+        if self.__parallel > 1:
+            pid_prefix = '{:7}: '.format(os.getpid()).encode()
+
+        # Пустая строка придерживается на один шаг: '\n' перед статусной
+        # строкой добавлен сервером, а не командой, и не транслируется.
+        pending_nl = False
+        while True:
+            line = server.stdout.readline()
+            if not line:
+                # Сервер завершился не выдав статус
+                return None
+            if line.startswith(BuildTraceAnalyzerPVS.__serve_status_prefix):
+                try:
+                    return int(line[len(BuildTraceAnalyzerPVS.__serve_status_prefix):])
+                except ValueError:
+                    return None
+            if pending_nl:
+                os.write(out_fd, pid_prefix + b'\n')
+            pending_nl = (line == b'\n')
+            if not pending_nl:
+                os.write(out_fd, pid_prefix + line)
+
+
+    # Запуск команды внутри chroot с рабочим каталогом cwd.
+    #   Возвращает код возврата команды.
+    def __run_in_chroot(self, cwd, args):
+        if (server := self.__get_chexec_server()) is not None:
+            returncode = self.__submit_chexec_job(server, cwd, args)
+            if returncode is not None:
+                return returncode
+            # Сервер не работает (например, chexec без --serve) - откат
+            self.__print("WARNING: chexec server failed, falling back to one-shot mode", flush=True)
+            self.__chexec_serve_broken = True
+            self.__shutdown_chexec_server()
+
+        command = [
+            'chroot', self.__root_str,
+            '/pvs/bin/chexec', cwd,
+            *args,
+        ]
+
+        # close_fds=False позволяет CPython использовать posix_spawn
+        # (vfork-путь) вместо полного fork+exec: не копируются таблицы
+        # страниц родителя, который может держать большой разобранный
+        # result.json. Лишних дескрипторов в процессе нет (CLOEXEC у pipe
+        # выставляет сам Popen), поэтому наследование безопасно.
+        proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, close_fds=False)
+        self.__stream_output(proc.stdout.fileno())
+        proc.wait()
+        return proc.returncode
 
 
     # --------------
@@ -241,27 +662,41 @@ class BuildTraceAnalyzerPVS:
 
         # --------------
         # Копируем chexec в root-каталог для chroot
+        #   Если там уже лежит идентичный (размер и mtime совпадают),
+        #   повторное копирование бинарника не нужно.
         #
         if os.path.exists('/usr/bin/chexec'):
-            shutil.copy2('/usr/bin/chexec', self.__source_dir / 'root/pvs/bin/')
+            src_stat = os.stat('/usr/bin/chexec')
+            dst_path = self.__source_dir / 'root/pvs/bin/chexec'
+            try:
+                dst_stat = dst_path.stat()
+                up_to_date = (dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime >= src_stat.st_mtime)
+            except OSError:
+                up_to_date = False
+            if not up_to_date:
+                shutil.copy2('/usr/bin/chexec', dst_path)
 
         # Создаем каталог /tmp в chroot для pvs-studio:
         (self.__source_dir / 'root/tmp').mkdir(mode=0o777, parents=True, exist_ok=True)
 
 
+    # Маскирующие замены лицензионных аргументов (ключ - префикс до '=')
+    __lic_mask : Final[dict] = {
+        '--lic-name': '--lic-name=****',
+        '--lic-key' : '--lic-key=****-****-****-****',
+    }
+
     # --------------
     # Маскировка лицензионных данных в выводе
     #
     def __mask_lic_info(self, command):
-        # --lic-name=****
-        # --lic-key=****-****-****-****
+        # partition - один C-вызов на аргумент вместо пары startswith
         ret = []
         for arg in command:
             if isinstance(arg, str):
-                if arg.startswith('--lic-name='):
-                    arg = '--lic-name=****'
-                elif arg.startswith('--lic-key='):
-                    arg = '--lic-key=****-****-****-****'
+                masked = BuildTraceAnalyzerPVS.__lic_mask.get(arg.partition('=')[0])
+                if masked is not None:
+                    arg = masked
             ret.append(arg)
         return ret
 
@@ -269,89 +704,127 @@ class BuildTraceAnalyzerPVS:
     # Чтение исходных данных
     #
     def __read_result_json(self):
-        input_json = []
-        with (self.__source_dir / 'result.json').open() as file:
-            input_json = json.load(file)        
-        return input_json
+        # Потоковое чтение: элементы выдаются по мере парсинга массива,
+        # целиком список в памяти не строится (при наличии ijson).
+        # Без ijson файл читается целиком самым быстрым доступным парсером.
+        with (self.__source_dir / 'result.json').open('rb') as file:
+            if ijson is not None:
+                yield from ijson.items(file, 'item')
+            else:
+                yield from _json_loads(file.read())
 
     # --------------
-    # Обработка элемента
+    # Проверка актуальности результата
     #
-    def processing_item(self, cc):
-        # --------------
+    # Результат считается актуальным, если он новее препроцессированного
+    # файла (и исходника, если тот есть в скопированном chroot).
+    def __is_up_to_date(self, result_file_on_host, preprocessed_file, source_file):
+        try:
+            out_mtime = os.stat(result_file_on_host).st_mtime
+            src_mtime = os.stat(os.path.join(self.__root_str, 'pvs', preprocessed_file)).st_mtime
+        except OSError:
+            return False
 
-        self.__print("ANALYSIS-START------------------")
-        self.__print("file:", cc['preprocessed_file'])
+        try:
+            src_mtime = max(src_mtime, os.stat(os.path.join(self.__root_str, source_file.lstrip('/'))).st_mtime)
+        except OSError:
+            pass
+
+        return out_mtime > src_mtime
+
+
+    # --------------
+    # Прогрев состояния воркера (вызывается initializer'ом пула)
+    #
+    # Буфер вывода и chexec-сервер создаются до первого задания,
+    # чтобы их стоимость не входила во время первого элемента.
+    def worker_init(self):
+        self.__get_out_buffer()
+        self.__get_chexec_server()
 
+
+    # --------------
+    # Обработка элемента (по индексу в колонках WorkItems)
+    #
+    def processing_index(self, idx):
         # --------------
+        # Поля элемента из колонок
 
-        pvs_studio_args = [
-            '--platform=linux64',
-            '--new-output-format=yes',
-            '--disable-ms-extensions=yes',
-        ]
+        items = self.__items
+        preprocessed_file = items.preprocessed_file[idx]
+        source_file       = items.source_file[idx]
+        compiler_id       = items.compiler_id[idx]
+        compiler_like     = items.compiler_like[idx]
+        lang              = items.lang[idx]
+        standard          = items.standard[idx]
+        cwd               = items.cwd[idx]
 
-        # ----
-        # ----
-        # TODO:
-        #   Временная заглушка для отключения проверки путей /opt/mcst/lcc-home/ - это должен быть системный путь
-        #
-        #   Похоже, что средствами параметров pvs-studio не применяя --exclude-path не реализовать поведение,
-        #   как для системных определений на x86
+        # --------------
 
-        pvs_studio_args.append('--exclude-path=/opt/mcst/lcc-home/')
+        self.__print("ANALYSIS-START------------------")
+        self.__print("file:", preprocessed_file)
 
-        # ----
-        # ----
+        # --------------
+
+        pvs_studio_args = list(BuildTraceAnalyzerPVS.__static_pvs_args)
 
         # Препроцессор
-        if (pp := PVS.map_preprocessor(cc['command']['compiler'].get('id'), cc['command']['compiler'].get('like'))):
+        if (pp := PVS.map_preprocessor(compiler_id, compiler_like)):
             pvs_studio_args.append('--preprocessor=' + pp)
         else:
             pvs_studio_args.append('--preprocessor=' + PVS.default_preprocessor())
-            self.__print("WARNING: unknown preprocessor:", cc['command']['compiler'])
+            self.__print("WARNING: unknown preprocessor:", compiler_id, compiler_like)
 
         # Язык
-        pvs_studio_args.append('--language=' + PVS.map_lang(cc['source_metadata']['lang']))
+        pvs_studio_args.append('--language=' + PVS.map_lang(lang))
 
         # Стандарт
-        if (std := PVS.map_std(cc['source_metadata']['standard'])):
+        if (std := PVS.map_std(standard)):
             pvs_studio_args.append('--std=' + std)
 
         # ----
         # ----
         # Формирование имени выходного файла
-        result_file_parts = [*Path(cc['preprocessed_file']).parts][1:]
-        result_file_parts[-1] = os.path.splitext(result_file_parts[-1])[0]+'.PVS-Studio.log'
-        result_file = Path(*result_file_parts)
+        #   Строковые операции вместо двух обходов через Path:
+        #   отбрасываем первый компонент пути и заменяем расширение.
+        result_file = preprocessed_file.split('/', 1)[1]
+        result_file = result_file.rsplit('.', 1)[0] + '.PVS-Studio.log'
 
         # Создание каталога выходного файла
-        real_result_file_on_host = self.__result_dir / result_file
-        real_result_file_on_host.parent.mkdir(mode=0o755, parents=True, exist_ok=True)
+        real_result_file_on_host = os.path.join(self.__result_str, result_file)
+
+        # Инкрементальный режим: если результат новее входных данных,
+        # повторный анализ не нужен (BUILD_TRACER_PVS_FORCE=1 - пересчет).
+        if not self.__force and self.__is_up_to_date(real_result_file_on_host, preprocessed_file, source_file):
+            self.__print("SKIP (up to date):", preprocessed_file, flush=True)
+            self.__print("ANALYSIS-END--------------------", flush=True)
+            return
+
+        self.__ensure_dir(os.path.dirname(real_result_file_on_host))
 
         # --
 
         # Добавление исходного препроцессированного и выходного файла
-        pvs_studio_args.extend([ '--source-file', cc['source_file']                             ])
-        pvs_studio_args.extend([ '--i-file'     , Path('/pvs')        / cc['preprocessed_file'] ])
-        pvs_studio_args.extend([ '--output-file', Path('/pvs/result') / result_file             ])
+        pvs_studio_args.extend([ '--source-file', source_file                                              ])
+        pvs_studio_args.extend([ '--i-file'     , BuildTraceAnalyzerPVS.__pvs_in_dir  + preprocessed_file  ])
+        pvs_studio_args.extend([ '--output-file', BuildTraceAnalyzerPVS.__pvs_out_dir + result_file        ])
 
         # ----
         # ----
 
         # ----
-        # Каталог cc['command']['cwd'] надо создавать, так как система сборки может использовать
+        # Рабочий каталог компилятора надо создавать, так как система сборки может использовать
         # отдельные рабочие каталоги для объектных файлов и полные пути к исходникам.
         # В этом случае этот каталог не скопируется.
-        real_cwd_on_host = (self.__source_dir / 'root' / Path(*Path(cc['command']['cwd']).parts[1:]))
-        real_cwd_on_host.mkdir(mode=0o755, parents=True, exist_ok=True)
+        real_cwd_on_host = os.path.join(self.__root_str, cwd.lstrip('/'))
+        self.__ensure_dir(real_cwd_on_host)
 
+        # Одним списковым литералом, без промежуточных конкатенаций
         command = [
-            'chroot', self.__source_dir / 'root',
-            '/pvs/bin/chexec', cc['command']['cwd'],
-
             '/pvs/bin/pvs-studio',
-        ] + pvs_studio_args + self.__pvs_studio_external_args
+            *pvs_studio_args,
+            *self.__pvs_studio_external_args,
+        ]
 
 
         # --------------
@@ -360,17 +833,14 @@ class BuildTraceAnalyzerPVS:
         self.__print("PVS сommand:", self.__mask_lic_info(command))
         self.__print("PVS-START-------")
 
-        proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
-        for line in proc.stdout:
-            self.__print(line.rstrip())
-        proc.wait()
+        returncode = self.__run_in_chroot(cwd, command)
 
         self.__print("PVS-END---------")
-        self.__print("PVS exit code:", proc.returncode)
+        self.__print("PVS exit code:", returncode)
 
         # --------------
-        # Конец
-        self.__print("ANALYSIS-END--------------------")
+        # Конец (граница элемента - сбрасываем буфер вывода)
+        self.__print("ANALYSIS-END--------------------", flush=True)
 
         # --------------
 
@@ -48,18 +48,25 @@
 #
 # --------------------------------------------------------------
 
-import copy
+import array
+import binascii
+import bisect
+import ctypes
+import fcntl
+import functools
 import hashlib
-import io
-import itertools
 import json
+import mmap
 import multiprocessing
 import os
 import os.path
 import re
+import select
 import shutil
+import struct
 import subprocess
 import sys
+import threading
 import time
 
 from collections import Counter
@@ -70,6 +77,47 @@ from typing      import Any, Final
 import dataclasses
 from dataclasses import dataclass
 
+# slots=True для "горячих" dataclass'ов (создаются миллионами при парсинге
+# трейсов): без per-instance __dict__ экономится ~100 байт на экземпляр.
+# Параметр появился в Python 3.10; в chroot'ах со старым python3
+# (RHEL 9 - python3.9) классы остаются обычными dataclass'ами.
+_dc_slots : Final[dict] = { 'slots': True } if sys.version_info >= (3, 10) else {}
+
+# Линейный по времени regex-движок (опционально):
+#   google-re2 компилирует шаблон в DFA без бэктрекинга - на strace-логах
+#   в миллионы строк разбор перестает упираться в перебор вариантов re.
+#   Интерфейс совпадает с re (named groups поддерживаются), поэтому
+#   подмена прозрачна; неподдерживаемые шаблоны откатываются на re.
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+def _compile_regex(pattern):
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+# Быстрый JSON-сериализатор (опционально):
+#   orjson пишет результат на порядок быстрее стандартного json;
+#   формат result.json (массив, отступы) сохраняется.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Быстрый хеш для контентно-адресуемых имен файлов (опционально):
+#   blake3 SIMD-векторизован и в разы быстрее SHA-256 без SHA-NI;
+#   криптостойкость здесь не требуется. Без пакета - hashlib.sha256,
+#   имена файлов при этом совпадают с прежними.
+try:
+    from blake3 import blake3 as _result_hash
+except ImportError:
+    _result_hash = hashlib.sha256
+
 
 
 # --------------------------------------------------------------
@@ -125,6 +173,31 @@ class Language:
     }
 
 
+# Быстрое выделение расширения для поиска по таблице Language.source_exts:
+# полная логика os.path.splitext (ведущие точки, повторные точки и т.п.)
+# здесь не нужна - достаточно последней точки в базовом имени пути.
+def _ext(s : str) -> str:
+    i = s.rfind('.')
+    if i <= 0 or '/' in s[i:] or s[i-1] == '/':
+        return ''
+    return s[i:]
+
+
+# Предрасчет для горячего пути классификации аргументов: расширения,
+# сгруппированные по длине. Вместо выделения расширения достаточно
+# проверить точку на фиксированной позиции от конца и запросить срез
+# в маленьком словаре своей длины. Длины упорядочены по возрастанию:
+# первая найденная точка - это последняя точка строки.
+_SOURCE_EXTS_BY_LEN : Final[dict] = {}
+for _e, _m in Language.source_exts.items():
+    _SOURCE_EXTS_BY_LEN.setdefault(len(_e), {})[_e] = _m
+_SOURCE_EXT_LENS : Final[tuple] = tuple(sorted(_SOURCE_EXTS_BY_LEN))
+# Кортеж всех известных расширений для быстрой отбраковки аргументов одним
+# вызовом str.endswith (реализован на C): -I/-D/-Wl,... отсеиваются сразу.
+_SOURCE_EXTS_TUPLE : Final[tuple] = tuple(Language.source_exts)
+del _e, _m
+
+
 
 # --------------------------------------------------------------
 # Компиляторы
@@ -149,16 +222,49 @@ class CompilerId:
             return { 'id': self.id, 'like': self.like, 'version': self.version }
 
 
-@dataclass
+@dataclass(eq=True, frozen=True, **_dc_slots)
 class CompilerCommand:
     cwd       : Path
     compiler  : CompilerId
     executable: str
-    args      : list[str]
+    args      : tuple[str, ...]
 
     # Только для счетчиков
     def as_tuple(self):
-        return (self.cwd, self.compiler, self.executable, tuple(e for e in self.args))
+        return (self.cwd, self.compiler, self.executable, self.args)
+
+
+# Служебные исходники CMake, компилируемые при определении компилятора:
+#   CMakeFiles/3.27.6/CompilerIdCXX/{CMakeCXXCompilerId.cpp,a.out,tmp}
+_CMAKE_INTERNAL_SOURCES : Final[frozenset] = frozenset({ 'CMakeCCompilerId.c', 'CMakeCXXCompilerId.cpp' })
+
+
+# Байтовый префикс хеша имени препроцессированного файла: общие для всех
+# исходников поля команды кодируются один раз на уникальную команду
+# (CompilerCommand заморожен и хешируем - ключ lru_cache).
+@functools.lru_cache(maxsize=4096)
+def _command_hash_parts(command : CompilerCommand) -> bytes:
+    return b'\x00'.join([
+        str(command.cwd).encode(),
+        command.compiler.id.encode(),
+        command.compiler.like.encode() if command.compiler.like else b'',
+        str(command.executable).encode(),
+        *[ a.encode() for a in command.args ],
+        b'',
+        b'',
+    ])
+
+
+# Хеш-объект, уже заполненный префиксом команды: при нескольких исходниках
+# в одном вызове на каждый достаточно copy() (memcpy внутреннего состояния
+# в пару сотен байт) и дохеширования хвоста вместо повторного прохода по
+# всем аргументам.
+@functools.lru_cache(maxsize=4096)
+def _command_hash_prefix(command : CompilerCommand):
+    h = _result_hash()
+    h.update(_command_hash_parts(command))
+    h.update(b'\x00')
+    return h
 
 
 # Метаданные файла исходного кода
@@ -255,17 +361,36 @@ class CompilerMatcher:
             return 1
 
 
+    # Предрасчет таблиц стандартов: версии распарсены в кортежи и
+    # отсортированы по возрастанию (None - нижняя граница, пустой кортеж),
+    # выбор записи сводится к bisect_right без разбора строк на каждый вызов.
+    # Кортежи дополняются нулями до фиксированной ширины: кортежи разной
+    # длины сравниваются лексикографически ((5, 0) < (5, 0, 0)), и версия
+    # "5.0" ровно на пороге таблицы выбрала бы предыдущую запись, тогда как
+    # version_compare выравнивает длины ("5.0" == "5.0.0").
+    __std_default_versions = {
+        cid: [ ((tuple(map(int, v.split('.'))) + (0, 0, 0, 0))[:4] if v else ()) for v, m in entries ]
+        for cid, entries in __std_default.items()
+    }
+    __std_default_maps = {
+        cid: [ m for v, m in entries ]
+        for cid, entries in __std_default.items()
+    }
+
+    # Разбор строки версии с мемоизацией: уникальных версий - единицы.
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __parse_version(version : str) -> tuple:
+        return (tuple(map(int, version.split('.'))) + (0, 0, 0, 0))[:4]
+
+
     # Получение стандарта по умолчанию для заданного компилятора.
     @staticmethod
     def get_default_std(compiler: CompilerId, lang : Language.ID) -> str:
-        data = CompilerMatcher.__std_default[compiler.id]
-        i = len(data)-1
-        while data[i][0]:
-            c = CompilerMatcher.version_compare(data[i][0], compiler.version)
-            if c <= 0:
-                return data[i][1][lang]
-            i -= 1
-        return data[0][1][lang]
+        versions = CompilerMatcher.__std_default_versions[compiler.id]
+        # Последняя запись с минимальной версией <= версии компилятора
+        i = bisect.bisect_right(versions, CompilerMatcher.__parse_version(compiler.version))
+        return CompilerMatcher.__std_default_maps[compiler.id][i-1][lang]
 
 
     # Получение стандарта для опции -ansi для заданного компилятора.
@@ -287,8 +412,46 @@ class CompilerMatcher:
         # gcc -> lcc:
         re.compile(r"/(?:[^/]+\-)?(?:(?:cc)|(?:gcc)|(?:c\+\+)|(?:g\+\+))(?:(:?-\d+)(:?.\d+)*)?$"),
     ]
-    __id_version_ncache = set()
-    __id_version_cache = dict()
+    # Межсборочный кеш идентификации: бинарник компилятора между сборками
+    # не меняется, поэтому отпечаток первых 64 КБ ELF (заголовок + начало
+    # .text различают версии) -> CompilerId сохраняется в JSON на диске.
+    # На теплом кеше запуск '<compiler> --version' не нужен вовсе.
+    __fingerprint_cache_name : Final[str] = 'compiler-cache.json'
+
+    def __init__(self, cache_dir : Path = None):
+        self.__cache_path        : Final[Path] = (cache_dir / CompilerMatcher.__fingerprint_cache_name) if cache_dir is not None else None
+        self.__fingerprint_cache : dict        = {}
+        if self.__cache_path is not None:
+            try:
+                with self.__cache_path.open() as f:
+                    self.__fingerprint_cache = { k: CompilerId(**v) for k, v in json.load(f).items() }
+            except (OSError, ValueError, TypeError):
+                pass
+
+    @staticmethod
+    def __fingerprint(path : str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            h.update(f.read(65536))
+        return h.hexdigest()
+
+    def __fingerprint_cache_store(self, fingerprint : str, cid : CompilerId):
+        self.__fingerprint_cache[fingerprint] = cid
+        if self.__cache_path is None:
+            return
+        try:
+            tmp_path = self.__cache_path.with_suffix('.tmp')
+            with tmp_path.open('w') as f:
+                json.dump({ k: dataclasses.asdict(v) for k, v in self.__fingerprint_cache.items() }, f, indent=4)
+            tmp_path.rename(self.__cache_path)
+        except OSError:
+            pass
+
+    # Кеш по inode: один и тот же бинарник компилятора вызывается под
+    # разными путями и argv[0] (симлинки cc/gcc, абсолютные и относительные
+    # пути) - ключ (st_dev, st_ino) склеивает такие вызовы без повторного
+    # запуска '<compiler> --version' (единицы-десятки мс на запуск).
+    __inode_cache = dict()
     __id_version_regex = [
         # lcc:
         #   lcc:1.27.14:Jan-31-2024:e2k-v5-linux
@@ -316,69 +479,116 @@ class CompilerMatcher:
     ]
 
     # Получение идентификатора и версии компилятора
+    #   match инспектирует только путь и argv[0] - ключ мемоизации именно
+    #   такой. Ограниченный LRU вместо прежних безразмерных словарей
+    #   позитивного/негативного кеша: в него попадают и None-результаты.
     def match(self, path : str, args) -> CompilerId:
-        id_tuple = (path, args[0])
+        return self.__match_cached(path, args[0])
 
-        # Если есть в негативном кеше
-        if id_tuple in CompilerMatcher.__id_version_ncache:
+    @functools.lru_cache(maxsize=4096)
+    def __match_cached(self, path : str, argv0 : str) -> CompilerId:
+        if not any( r.search(path) for r in CompilerMatcher.__prefilter_by_path_regex ):
             return None
 
-        if (cid := CompilerMatcher.__id_version_cache.get(id_tuple)):
+        st_key = None
+        try:
+            st = os.stat(path)
+            st_key = (st.st_dev, st.st_ino)
+        except OSError:
+            pass
+
+        if st_key is not None and (cid := CompilerMatcher.__inode_cache.get(st_key)):
             return cid
 
-        if not any( r.search(path) for r in CompilerMatcher.__prefilter_by_path_regex ):
-            CompilerMatcher.__id_version_ncache.add(id_tuple)
-            return None
+        fingerprint = None
+        if st_key is not None:
+            try:
+                fingerprint = CompilerMatcher.__fingerprint(path)
+            except OSError:
+                pass
+
+        if fingerprint is not None and (cid := self.__fingerprint_cache.get(fingerprint)):
+            CompilerMatcher.__inode_cache[st_key] = cid
+            return cid
 
         #if not os.path.exists(path):
         #    return None
         try:
-            ret = subprocess.run([args[0], '--version'], executable=path, capture_output=True, text=True, env={ "LC_ALL": "C", "LANG": "C" })
+            # close_fds=False: без обхода /proc/self/fd перед exec
+            ret = subprocess.run([argv0, '--version'], executable=path, capture_output=True, text=True, close_fds=False, env={ "LC_ALL": "C", "LANG": "C" })
         except Exception as e:
             # FileNotFoundError и другие
-            CompilerMatcher.__id_version_ncache.add(id_tuple)
             return None
 
         if ret.returncode != 0:
-            CompilerMatcher.__id_version_ncache.add(id_tuple)
             return None
 
         stdout_lines = ret.stdout.splitlines()
         for r in CompilerMatcher.__id_version_regex:
             if (m := r[0].search(stdout_lines[0])):
                 cid = r[1](m['version'])
-                CompilerMatcher.__id_version_cache[id_tuple] = cid
+                if st_key is not None:
+                    CompilerMatcher.__inode_cache[st_key] = cid
+                if fingerprint is not None:
+                    self.__fingerprint_cache_store(fingerprint, cid)
                 return cid
 
-        CompilerMatcher.__id_version_ncache.add(id_tuple)
         return None
 
 
     # TODO: Вычислять реальные параметры компиляторов (сейчас берутся все параметры с подходящим расширением)
+    #
+    # Одна и та же командная строка компилятора встречается многократно
+    # (повторные вызовы с совпадающими аргументами в разных процессах),
+    # поэтому разбор аргументов мемоизируется по кортежу аргументов.
     def get_sources_from_args(self, cc_command : CompilerCommand):
+        return CompilerMatcher.__get_sources_from_args_cached(cc_command.args)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def __get_sources_from_args_cached(args : tuple):
         sources_in_args = list()
-        for arg in cc_command.args:
-            ext = os.path.splitext(arg)[1]
-            meta = Language.source_exts.get(ext)
-            if meta is not None:
-                if meta[0] == Language.FileType.SOURCE:
-                    sources_in_args.append(arg)
-        return sources_in_args
+        for arg in args:
+            # Быстрая отбраковка: подавляющее большинство аргументов
+            # (-I..., -D..., -Wl,...) не оканчивается известным расширением.
+            if not arg.endswith(_SOURCE_EXTS_TUPLE):
+                continue
+            L = len(arg)
+            for k in _SOURCE_EXT_LENS:
+                if L > k and arg[L-k] == '.' and arg[L-k-1] != '/':
+                    meta = _SOURCE_EXTS_BY_LEN[k].get(arg[L-k:])
+                    if meta is not None and meta[0] == Language.FileType.SOURCE:
+                        sources_in_args.append(arg)
+                    break
+        return tuple(sources_in_args)
 
 
     def get_source_metadata(self, cc_command : CompilerCommand, source):
+        return CompilerMatcher.__get_source_metadata_cached(cc_command.args, cc_command.compiler, source)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def __get_source_metadata_cached(args : tuple, compiler : CompilerId, source : str):
         # Извлечение стандарта
         #   gcc,lcc: -std=<value>
         #   clang  : -std=<arg>, --std=<arg>, --std <arg>
+        # Один проход по аргументам без regex - грамматика тривиальна,
+        # достаточно проверок префиксов; -ansi отмечается тем же проходом.
         std      = None
         std_lang = None
-        for i, arg in enumerate(cc_command.args):
-            if (m := re.match(r"^-?-std=(?P<std>.*)$", arg)):
-                std = m['std']
+        has_ansi = False
+        for i, arg in enumerate(args):
+            if arg.startswith('-std='):
+                std = arg[5:]
+                break
+            elif arg.startswith('--std='):
+                std = arg[6:]
                 break
             elif arg == '--std':
-                std = cc_command.args[i+1]
+                std = args[i+1]
                 break
+            elif arg == '-ansi':
+                has_ansi = True
         if std is not None:
             if '++' in std:
                 std_lang = Language.ID.CXX
@@ -387,13 +597,13 @@ class CompilerMatcher:
 
         # Язык фронтенда
         frontend_lang = None;
-        if '++' in cc_command.args[0]:
+        if '++' in args[0]:
             frontend_lang = Language.ID.CXX
         else:
             frontend_lang = Language.ID.C
 
         # Язык файла
-        ext_meta = Language.source_exts[ os.path.splitext(source)[1] ]
+        ext_meta = Language.source_exts[ _ext(source) ]
         file_lang = ext_meta[1][0]
         assert ext_meta[0] == Language.FileType.SOURCE
 
@@ -416,49 +626,49 @@ class CompilerMatcher:
             ret_std = None # Сброс в дефолт, игнор
 
         # Обработка -ansi
-        if ret_std is None and std is None and '-ansi' in cc_command.args:
-            ret_std = CompilerMatcher.get_ansi_std(cc_command.compiler, ret_lang)
+        if ret_std is None and std is None and has_ansi:
+            ret_std = CompilerMatcher.get_ansi_std(compiler, ret_lang)
 
         # Выбор std по умолчанию
         if ret_std is None:
-            ret_std = CompilerMatcher.get_default_std(cc_command.compiler, ret_lang)
+            ret_std = CompilerMatcher.get_default_std(compiler, ret_lang)
 
         return SourceFileCompilerMetadata(ret_lang, ret_std)
 
 
     def make_preprocessor_command(self, cc_command, preprocessed_result_file, source_idx, sources_in_args):
-        # Полное рекурсивное копирование всех структур
-        preprocessed_command = copy.deepcopy(cc_command)
+        # Аргументы собираются в рабочем списке; разделяемые поля
+        # (cwd, compiler - frozen) переносятся через dataclasses.replace.
 
         # Удаляем исходные файлы из аргументов
-        preprocessed_command.args = [ arg for arg in preprocessed_command.args if arg not in sources_in_args ]
+        args = [ arg for arg in cc_command.args if arg not in sources_in_args ]
 
         # Заменяем вывод на препроцессированный вывод
         o_idx = None
         try:
-            o_idx = preprocessed_command.args.index('-o')
+            o_idx = args.index('-o')
         except ValueError:
             pass
         unknown_preprocessor = True
-        for id in preprocessed_command.compiler.ids():
+        for id in cc_command.compiler.ids():
             if id is None:
                 continue
             if id in ['lcc', 'gcc', 'clang']:
-                if '-E' in preprocessed_command.args:
+                if '-E' in args:
                     raise ValueError("-E already present in args")
                 e_args = ['-E', '-o', str(preprocessed_result_file)]
                 if o_idx is not None:
-                    preprocessed_command.args[o_idx:o_idx+2] = e_args
+                    args[o_idx:o_idx+2] = e_args
                 else:
                     # Не задан выходной файл - дописываем аргументы после имени компилятора
-                    preprocessed_command.args[1:1] = e_args
-                preprocessed_command.args.append(sources_in_args[source_idx])
+                    args[1:1] = e_args
+                args.append(sources_in_args[source_idx])
                 unknown_preprocessor = False
                 break
 
         assert (unknown_preprocessor == False), "unknown compiler, inconsistency CompilerMatcher"
 
-        return preprocessed_command
+        return dataclasses.replace(cc_command, args=tuple(args))
 
 
 
@@ -502,19 +712,23 @@ class OpenFilesFilter:
     ]
 
 
-    def __init__(self):
-        self.__ignore_regex = re.compile('|'.join(
-            map(lambda s: '(?:' + s + ')', itertools.chain(
-                # Список регулярных выражений сложных расширений
-                OpenFilesFilter.ignore_ext_regex,
+    # Предрасчет структур проверки (один раз при загрузке класса):
+    #  - простые расширения - кортеж для одного C-вызова str.endswith;
+    #  - каталоги - префиксное дерево по компонентам пути;
+    #  - за regex остаются только "сложные" расширения (so с версиями).
+    __ignore_ext_tuple : Final[tuple] = tuple(ignore_ext_list)
 
-                # Список расширений
-                map(lambda e: re.escape(e) + '$', OpenFilesFilter.ignore_ext_list),
+    __ignore_ext_regex_compiled : Final = _compile_regex(
+        '|'.join(map(lambda s: '(?:' + s + ')', ignore_ext_regex))
+    )
 
-                # Список каталогов
-                map(lambda d: '^' + re.escape(d) + '(?:$|/)', OpenFilesFilter.ignore_dir_list)
-            ))
-        ))
+    __ignore_dir_trie : Final[dict] = {}
+    for _d in ignore_dir_list:
+        _node = __ignore_dir_trie
+        for _c in _d.strip('/').split('/'):
+            _node = _node.setdefault(_c, {})
+        _node[''] = True # терминальный маркер: каталог запрещен целиком
+    del _d, _c, _node
 
 
     def allow(self, path : Path) -> bool:
@@ -522,9 +736,22 @@ class OpenFilesFilter:
         # Путь в списке запрещенных файлов
         if path_str in OpenFilesFilter.ignore_file_list:
             return False
-        # Путь в списке запрещенных по регулярным выражениям
-        if self.__ignore_regex.search(path_str):
+        # Запрещенные расширения
+        if path_str.endswith(OpenFilesFilter.__ignore_ext_tuple):
+            return False
+        if OpenFilesFilter.__ignore_ext_regex_compiled.search(path_str):
             return False
+        # Запрещенные каталоги: спуск по префиксному дереву -
+        # на частом разрешающем пути это пара запросов в маленькие dict.
+        node = OpenFilesFilter.__ignore_dir_trie
+        for comp in path_str.split('/'):
+            if not comp:
+                continue
+            node = node.get(comp)
+            if node is None:
+                break
+            if '' in node:
+                return False
         return True
 
 
@@ -558,14 +785,14 @@ class Timer:
 #
 #
 
-@dataclass
+@dataclass(**_dc_slots)
 class SysCallError:
     errno : int
     errstr: str
 
-@dataclass
+@dataclass(**_dc_slots)
 class SysCallEntity:
-    ts          : float
+    ts          : int # unix-время в наносекундах
     name        : str
     returnvalue : int
     returnfile  : str = None
@@ -575,15 +802,28 @@ class SysCallEntity:
 
 
 
-@dataclass
+@dataclass(**_dc_slots)
 class ProcTrace:
     pid     : int
     cwd     : Path   = None
-    ts_start: float  = None
-    ts_end  : float  = None
+    ts_start: int    = None # unix-время в наносекундах
+    ts_end  : int    = None # unix-время в наносекундах
     exitcode: int    = None
     killedby: str    = None
-    syscall : list[SysCallEntity] = dataclasses.field(default_factory=list)
+    # Журнал системных вызовов в SoA-раскладке: параллельные колонки вместо
+    # списка объектов SysCallEntity. Проходы-агрегаторы бегут по нужным
+    # колонкам без материализации объектов; int-колонки - компактные
+    # array.array. Объект SysCallEntity восстанавливается по требованию.
+    sc_ts   : array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    sc_name : list[str]   = dataclasses.field(default_factory=list)
+    sc_rv   : array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    sc_args : list[Any]   = dataclasses.field(default_factory=list)
+
+    def __len__(self):
+        return len(self.sc_name)
+
+    def __getitem__(self, i : int) -> SysCallEntity:
+        return SysCallEntity(self.sc_ts[i], self.sc_name[i], self.sc_rv[i], args=self.sc_args[i])
 
 
 #
@@ -600,56 +840,237 @@ class SysCallFilter:
         return True
 
 
+# Символьные O_-флаги strace -> битовая маска ОС: проверка режима доступа
+# потребителями сводится к '(flags & O_ACCMODE) == O_RDONLY' вместо
+# split('|') со сравнением строк на каждое событие открытия файла.
+# Уникальных комбинаций флагов - единицы, конвертация мемоизируется.
+_OFLAG_BITS : Final[dict] = { _n: getattr(os, _n) for _n in dir(os) if _n.startswith('O_') }
+
+@functools.lru_cache(maxsize=None)
+def _oflags_to_bits(oflags : str) -> int:
+    bits = 0
+    for tok in oflags.split('|'):
+        bits |= _OFLAG_BITS.get(tok, 0)
+    return bits
+
+
+# Парсер остается чистым Python сознательно: трассировщик копируется в
+# chroot сборки как одиночный скрипт и работает на любой архитектуре
+# (включая e2k) без компиляции. Горячий путь ускорен средствами stdlib:
+# mmap + байтовые regex, ручные сплиттеры, опциональный re2.
 class StraceParser:
-    regex_line = re.compile(r"^(?P<timestamp>\d+\.\d+)\s(?:(?:\+\+\+ killed by (?P<killedby>[A-Z]+) (?:\(core dumped\) )?\+\+\+)|(?:\+\+\+ exited with (?P<exitcode>-?\d+) \+\+\+)|(?:(?P<syscall>(?:chdir)|(?:fork)|(?:vfork)|(?:clone)|(?:clone2)|(?:clone3)|(?:execve)|(?:execveat)|(?:fchdir)|(?:open)|(?:openat)|(?:openat2))\((?P<args>.*)\)(?:\s+)=(?:\s+)(?:(?P<returnvalue>\-?\d+)(?:(?:<(?P<returnfile>.*)>)|(?: (?P<errno>[A-Z]+) \((?P<errstr>.*)\)))?)))$")
+    regex_line = _compile_regex(rb"^(?P<timestamp>\d+\.\d+)\s(?:(?:\+\+\+ killed by (?P<killedby>[A-Z]+) (?:\(core dumped\) )?\+\+\+)|(?:\+\+\+ exited with (?P<exitcode>-?\d+) \+\+\+)|(?:(?P<syscall>(?:chdir)|(?:fork)|(?:vfork)|(?:clone)|(?:clone2)|(?:clone3)|(?:execve)|(?:execveat)|(?:fchdir)|(?:open)|(?:openat)|(?:openat2))\((?P<args>.*)\)(?:\s+)=(?:\s+)(?:(?P<returnvalue>\-?\d+)(?:(?:<(?P<returnfile>.*)>)|(?: (?P<errno>[A-Z]+) \((?P<errstr>.*)\)))?)))$")
 
     #regex_syscall_clone_args   = re.compile()
-    regex_syscall_execve_args  = re.compile(r"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", \[(?P<argv>\"(?:(\\x[0-9A-Fa-f]{2})*)\"(?:, \"(?:(\\x[0-9A-Fa-f]{2})*)\")*)(?:\.\.\.)?\], (?:(?:\[(?P<env>\"(?:(\\x[0-9A-Fa-f]{2})*)\"(?:, \"(?:(\\x[0-9A-Fa-f]{2})*)\")*)(?:\.\.\.)?\])|(?P<envph>0x[0-9a-fA-F]+ /\* [\d]+ vars \*/))$")
-    regex_syscall_chdir_args   = re.compile(r"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\"$")
-    regex_syscall_fchdir_args  = re.compile(r"^(?P<fd>\d+)<(?P<path>(\\x[0-9A-Fa-f]{2})*)>$")
-    regex_syscall_open_args    = re.compile(r"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", (?P<oflag>O_[A-Z]+(?:\|O_[A-Z]+)*)(?:, (?P<mode>\d+))?$")
-    regex_syscall_openat_args  = re.compile(r"^(?P<cwdfd>(?:(?:\d+)|(?:AT_FDCWD)))(?:<(?P<cwd>.*)>)?, \"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", (?P<oflag>O_[A-Z]+(?:\|O_[A-Z]+)*)(?:, (?P<mode>\d+))?$")
-    regex_syscall_openat2_args = re.compile(r"^(?P<cwdfd>(?:(?:\d+)|(?:AT_FDCWD)))(?:<(?P<cwd>.*)>)?, \"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", {(?P<how>[^}]*?)}, (?P<size>\d+)$")
+    regex_syscall_execve_args  = _compile_regex(rb"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", \[(?P<argv>\"(?:(\\x[0-9A-Fa-f]{2})*)\"(?:, \"(?:(\\x[0-9A-Fa-f]{2})*)\")*)(?:\.\.\.)?\], (?:(?:\[(?P<env>\"(?:(\\x[0-9A-Fa-f]{2})*)\"(?:, \"(?:(\\x[0-9A-Fa-f]{2})*)\")*)(?:\.\.\.)?\])|(?P<envph>0x[0-9a-fA-F]+ /\* [\d]+ vars \*/))$")
+    regex_syscall_chdir_args   = _compile_regex(rb"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\"$")
+    regex_syscall_fchdir_args  = _compile_regex(rb"^(?P<fd>\d+)<(?P<path>(\\x[0-9A-Fa-f]{2})*)>$")
+    regex_syscall_open_args    = _compile_regex(rb"^\"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", (?P<oflag>O_[A-Z]+(?:\|O_[A-Z]+)*)(?:, (?P<mode>\d+))?$")
+    regex_syscall_openat_args  = _compile_regex(rb"^(?P<cwdfd>(?:(?:\d+)|(?:AT_FDCWD)))(?:<(?P<cwd>.*)>)?, \"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", (?P<oflag>O_[A-Z]+(?:\|O_[A-Z]+)*)(?:, (?P<mode>\d+))?$")
+    regex_syscall_openat2_args = _compile_regex(rb"^(?P<cwdfd>(?:(?:\d+)|(?:AT_FDCWD)))(?:<(?P<cwd>.*)>)?, \"(?P<path>(\\x[0-9A-Fa-f]{2})*)\", {(?P<how>[^}]*?)}, (?P<size>\d+)$")
 
 
     def __init__(self, syscall_filter):
         self.__syscall_filter : SysCallFilter = syscall_filter;
 
 
-    def __decode_xstr(self, raw : str) -> str:
+    # Строка целиком из \xHH-эскейпов (обычный вид строк при -xx)
+    __xhex_regex : Final = re.compile(rb'(?:\\x[0-9A-Fa-f]{2})+$')
+
+    def __decode_xstr(self, raw : bytes) -> str:
         # Декодер строк в экранированном формате strace
+        # (вход - байты: с -xx строки экранированы как \xHH)
         if raw is None:
             return None
-        return raw.encode('latin1', 'backslashreplace').decode('unicode-escape')
-
-    def __decode_argv_env(self, raw : str) -> list[str]:
+        if b'\\x' not in raw:
+            # Неэкранированный путь (например, из --decode-fds)
+            return raw.decode('utf-8', 'surrogateescape')
+        if StraceParser.__xhex_regex.match(raw):
+            # Быстрая ветка: выкусить '\x' и раскодировать hex целиком
+            return binascii.unhexlify(raw.replace(b'\\x', b'')).decode('utf-8', 'surrogateescape')
+        # Общий случай - смешанное экранирование
+        return raw.decode('unicode-escape')
+
+    def __decode_argv_env(self, raw : bytes) -> list[str]:
         if raw is None:
             return None
-        l = raw.split(",")
-        for i in range(len(l)):
-            l[i] = self.__decode_xstr(l[i].strip().strip('"'))
-        return l
+        l = raw.split(b",")
+        return [ self.__decode_xstr(e.strip().strip(b'"')) for e in l ]
 
-    def parse_file(self, pid: int, path : Path) -> ProcTrace:
-        with path.open() as file:
-            return self.parse_fd(pid, file)
+    # --------------
+    # Разборщики аргументов системных вызовов.
+    #   Вызываются из parse_fd через словарь __arg_handlers по имени
+    #   syscall, заполняют syscall.args / args_raw.
+
+    def __parse_args_fork(self, syscall, args_raw):
+        # Для реальной работы требуется только возвращаемое значение
+        # Параметров НЕТ
+        pass
+
+    def __parse_args_clone(self, syscall, args_raw):
+        # Для реальной работы требуется только возвращаемое значение
+        # Сохраняем оригинальные параметры, так как не парсим их
+        syscall.args_raw = args_raw.decode('latin1')
+
+    def __parse_args_execve(self, syscall, args_raw):
+        am = StraceParser.regex_syscall_execve_args.match(args_raw)
+
+        av_path  = self.__decode_xstr(am.group('path'))
+        av_argv  = self.__decode_argv_env(am.group('argv'))
+        av_env   = self.__decode_argv_env(am.group('env'))
+        av_envph = am.group('envph')
+        if av_envph is not None:
+            av_envph = av_envph.decode()
+
+        syscall.args.append(av_path)
+        syscall.args.append(av_argv)
+        syscall.args.append(av_env if av_env is not None else av_envph)
+
+    def __parse_args_execveat(self, syscall, args_raw):
+        # TODO: Реализовать обработку execveat
+        raise NotImplementedError('Implement syscall parsing: execveat')
+
+    def __parse_args_chdir(self, syscall, args_raw):
+        am = StraceParser.regex_syscall_chdir_args.match(args_raw)
+        av_path  = self.__decode_xstr(am.group('path'))
+        syscall.args.append(av_path)
+
+    def __parse_args_fchdir(self, syscall, args_raw):
+        am = StraceParser.regex_syscall_fchdir_args.match(args_raw)
+        av_fd    = int(am.group('fd'))
+        av_path  = self.__decode_xstr(am.group('path'))
+        syscall.args.append( (av_fd, av_path) )
+
+    def __parse_args_open(self, syscall, args_raw):
+        am = StraceParser.regex_syscall_open_args.match(args_raw)
+        av_path  = self.__decode_xstr(am.group('path'))
+        av_oflag = _oflags_to_bits(am.group('oflag').decode())
+        av_mode  = am.group('mode')
+        syscall.args.append(av_path)
+        syscall.args.append(av_oflag)
+        if av_mode is not None:
+            syscall.args.append(av_mode.decode())
+
+    def __parse_args_openat(self, syscall, args_raw):
+        # Ручной разбор доминирующего системного вызова вместо regex:
+        # формат жесткий -
+        #   <fd|AT_FDCWD>[<cwd>], "<path>", O_FLAG[|O_FLAG...][, mode]
+        # (путь при -xx - только \xHH-эскейпы, кавычек внутри нет).
+        # Любое несоответствие формату - откат на прежний regex.
+        try:
+            i = args_raw.index(b', "')
+            j = args_raw.index(b'", ', i + 3)
+
+            head    = args_raw[:i]
+            av_path = self.__decode_xstr(args_raw[i+3:j])
+            tail    = args_raw[j+3:]
+
+            if head.endswith(b'>'):
+                k = head.index(b'<')
+                av_cwdfd = head[:k].decode()
+                av_cwd   = self.__decode_xstr(head[k+1:-1])
+            else:
+                av_cwdfd = head.decode()
+                av_cwd   = None
+            if av_cwdfd != 'AT_FDCWD' and not av_cwdfd.isdigit():
+                raise ValueError(av_cwdfd)
+
+            oflag_b, sep, mode_b = tail.partition(b', ')
+            if not oflag_b.startswith(b'O_'):
+                raise ValueError(oflag_b)
+            av_oflag = _oflags_to_bits(oflag_b.decode())
+            av_mode  = mode_b.decode() if sep else None
+        except ValueError:
+            am = StraceParser.regex_syscall_openat_args.match(args_raw)
+            av_cwdfd = am.group('cwdfd').decode()
+            av_cwd   = self.__decode_xstr(am.group('cwd'))
+            av_path  = self.__decode_xstr(am.group('path'))
+            av_oflag = _oflags_to_bits(am.group('oflag').decode())
+            av_mode  = am.group('mode')
+            if av_mode is not None:
+                av_mode = av_mode.decode()
+
+        # AT_FDCWD
+        syscall.args.append((av_cwdfd, av_cwd))
+        syscall.args.append(av_path)
+        syscall.args.append(av_oflag)
+        if av_mode is not None:
+            syscall.args.append(av_mode)
+
+    def __parse_args_openat2(self, syscall, args_raw):
+        am = StraceParser.regex_syscall_openat2_args.match(args_raw)
+        av_cwdfd = am.group('cwdfd').decode()
+        av_cwd   = self.__decode_xstr(am.group('cwd'))
+        av_path  = self.__decode_xstr(am.group('path'))
+        av_how   = am.group('how')
+        av_size  = am.group('size').decode()
+
+        how = dict()
+        if av_how is not None:
+            for a in av_how.split(b", "):
+                kv = a.split(b"=")
+                how[kv[0].decode()] = kv[1].decode()
+        if 'flags' in how:
+            how['flags'] = _oflags_to_bits(how['flags'])
+
+        # AT_FDCWD
+        syscall.args.append((av_cwdfd, av_cwd))
+        syscall.args.append(av_path)
+        syscall.args.append(how)
+        syscall.args.append(av_size)
+
+    __arg_handlers : Final[dict] = {
+        'fork'    : __parse_args_fork,
+        'vfork'   : __parse_args_fork,
+        'clone'   : __parse_args_clone,
+        'clone2'  : __parse_args_clone,
+        'clone3'  : __parse_args_clone,
+        'execve'  : __parse_args_execve,
+        'execveat': __parse_args_execveat,
+        'chdir'   : __parse_args_chdir,
+        'fchdir'  : __parse_args_fchdir,
+        'open'    : __parse_args_open,
+        'openat'  : __parse_args_openat,
+        'openat2' : __parse_args_openat2,
+    }
 
-    def parse_fd(self, pid: int, fd : io.TextIOBase) -> ProcTrace:
+
+    def parse_file(self, pid: int, path : Path) -> ProcTrace:
+        # mmap + разбор на уровне байтов: без декодирования каждой строки
+        # в str и без промежуточных буферов текстового слоя - на трейсах
+        # в сотни МБ это заметная доля времени парсинга.
+        with open(path, 'rb') as file:
+            try:
+                mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл не отображается
+                return ProcTrace(pid)
+            with mm:
+                return self.parse_fd(pid, mm)
+
+    def parse_fd(self, pid: int, fd) -> ProcTrace:
         proc = ProcTrace( pid )
-        for line in fd:
+        # SysCallEntity живет только внутри цикла разбора строки; в ProcTrace
+        # записи раскладываются по колонкам (см. комментарий у ProcTrace).
+        while (line := fd.readline()):
             line = line.rstrip()
             m = StraceParser.regex_line.match(line)
             if m is None:
                 continue
 
-            v_timestamp = float(m.group('timestamp'))
+            # Целочисленные наносекунды вместо float: int(bytes) дешевле
+            # float(bytes), нет потери точности на больших unix-временах
+            # (precision:ns дает 9 знаков дробной части).
+            ts_raw = m.group('timestamp')
+            dot = ts_raw.index(b'.')
+            v_timestamp = int(ts_raw[:dot]) * 1_000_000_000 + int(ts_raw[dot+1:].ljust(9, b'0'))
 
             proc.ts_start = v_timestamp if proc.ts_start is None else min(proc.ts_start, v_timestamp)
             proc.ts_end   = v_timestamp if proc.ts_end   is None else max(proc.ts_end  , v_timestamp)
 
             v_killedby  = m.group('killedby')
             if v_killedby is not None:
-                proc.killedby = v_killedby
+                proc.killedby = v_killedby.decode()
                 continue
 
             v_exitcode  = m.group('exitcode')
@@ -665,150 +1086,55 @@ class StraceParser:
             v_errstr      = m.group('errstr')
 
             if v_syscall is not None:
-                syscall = SysCallEntity(v_timestamp, v_syscall, int(v_returnvalue))
+                # Интернирование повторяющихся строк (имена syscall, errno,
+                # комбинации O_*-флагов): на трейсе - миллионы повторов,
+                # общий объект экономит память и ускоряет сравнения.
+                syscall = SysCallEntity(v_timestamp, sys.intern(v_syscall.decode()), int(v_returnvalue))
 
 #                print("syscall:", syscall.name, ":", syscall.returnvalue)
 
+                # Неуспешный вызов фильтр отбросит в любом случае - выходим
+                # сразу, не тратя время на разбор returnfile/errno и
+                # аргументов (на трейсе без опции -z таких строк большинство).
+                if syscall.returnvalue < 0:
+                    continue
+
                 if v_returnfile is not None:
                     syscall.returnfile = self.__decode_xstr(v_returnfile)
 #                    print(syscall.name, ":", syscall.returnfile)
 
                 if v_errno is not None:
-                    syscall.error = SysCallError(v_errno, v_errstr)
+                    syscall.error = SysCallError(sys.intern(v_errno.decode()), sys.intern(v_errstr.decode()))
 
 
                 # ПАРСИНГ АРГУМЕНТОВ
+                #   Диспетчеризация по имени - один запрос в словарь
+                #   вместо цепочки строковых сравнений на каждый syscall.
                 if v_args is not None:
                     args_raw = v_args.strip();
 
-                    if syscall.name == 'fork':
-                        # Для реальной работы требуется только возвращаемое значение
-                        # Параметров НЕТ
-#                        print("fork:", args_raw, v_returnvalue)
-                        pass
-                    elif syscall.name == 'vfork':
-                        # Для реальной работы требуется только возвращаемое значение
-                        # Параметров НЕТ
-#                        print("vfork:", args_raw, v_returnvalue)
-                        pass
-                    elif syscall.name == 'clone':
-                        # Для реальной работы требуется только возвращаемое значение
-                        # Сохраняем оригинальные параметры, так как не парсим их
-                        syscall.args_raw = args_raw
-#                        print("clone:", args_raw, v_returnvalue)
-                        pass
-                    elif syscall.name == 'clone2':
-                        # Для реальной работы требуется только возвращаемое значение
-                        # Сохраняем оригинальные параметры, так как не парсим их
-                        syscall.args_raw = args_raw
-#                        print("clone2:", args_raw, v_returnvalue)
-                        pass
-                    elif syscall.name == 'clone3':
-                        # Для реальной работы требуется только возвращаемое значение
-                        # Сохраняем оригинальные параметры, так как не парсим их
-                        syscall.args_raw = args_raw
-#                        print("clone3:", args_raw, v_returnvalue)
-                        pass
-                    elif syscall.name == 'execve':
-                        am = StraceParser.regex_syscall_execve_args.match(args_raw)
-
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        av_argv  = self.__decode_argv_env(am.group('argv'))
-                        av_env   = self.__decode_argv_env(am.group('env'))
-                        av_envph = am.group('envph')
-
-                        syscall.args.append(av_path)
-                        syscall.args.append(av_argv)
-                        syscall.args.append(av_env if av_env is not None else av_envph)
-
-#                        print("execve:", syscall.args)
-#                        print("execve:", args_raw, syscall.args)
-#                        print("execve:", args_raw)
-
-                    elif syscall.name == 'execveat':
-                        # TODO: Реализовать обработку execveat
-                        raise NotImplementedError('Implement syscall parsing: execveat')
-
-                    elif syscall.name == 'chdir':
-                        am = StraceParser.regex_syscall_chdir_args.match(args_raw)
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        syscall.args.append(av_path)
-
-#                        print("chdir:", args_raw, syscall.args)
-
-                    elif syscall.name == 'fchdir':
-                        am = StraceParser.regex_syscall_fchdir_args.match(args_raw)
-                        av_fd    = int(am.group('fd'))
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        syscall.args.append( (av_fd, av_path) )
-
-#                        print("fchdir:", args_raw, syscall.args)
-
-                    elif syscall.name == 'open':
-                        am = StraceParser.regex_syscall_open_args.match(args_raw)
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        av_oflag = am.group('oflag')
-                        av_mode  = am.group('mode')
-                        syscall.args.append(av_path)
-                        syscall.args.append(av_oflag)
-                        if av_mode is not None:
-                            syscall.args.append(av_mode)
-
-#                        print("open:", args_raw, syscall.args)
-
-                    elif syscall.name == 'openat':
-                        am = StraceParser.regex_syscall_openat_args.match(args_raw)
-                        av_cwdfd = am.group('cwdfd')
-                        av_cwd   = self.__decode_xstr(am.group('cwd'))
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        av_oflag = am.group('oflag')
-                        av_mode  = am.group('mode')
-
-                        # AT_FDCWD
-                        syscall.args.append((av_cwdfd, av_cwd))
-                        syscall.args.append(av_path)
-                        syscall.args.append(av_oflag)
-                        if av_mode is not None:
-                            syscall.args.append(av_mode)
-
-#                        print("openat:", args_raw, syscall.args)
-
-                    elif syscall.name == 'openat2':
-                        am = StraceParser.regex_syscall_openat2_args.match(args_raw)
-                        av_cwdfd = am.group('cwdfd')
-                        av_cwd   = self.__decode_xstr(am.group('cwd'))
-                        av_path  = self.__decode_xstr(am.group('path'))
-                        av_how   = am.group('how')
-                        av_size  = am.group('size')
-
-                        how = dict()
-                        if av_how is not None:
-                            for a in av_how.split(", "):
-                                kv = a.split("=")
-                                how[kv[0]] = kv[1]
-
-                        # AT_FDCWD
-                        syscall.args.append((av_cwdfd, av_cwd))
-                        syscall.args.append(av_path)
-                        syscall.args.append(how)
-                        syscall.args.append(av_size)
-
-#                        print("openat2:", args_raw, syscall.args)
+                    handler = StraceParser.__arg_handlers.get(syscall.name)
+                    if handler is not None:
+                        handler(self, syscall, args_raw)
                     else:
                         # Для неизвестного системного вызова сохраняем оригинальные параметры
-                        syscall.args_raw = args_raw
+                        syscall.args_raw = args_raw.decode('latin1')
 
                 # ----
 
-                # Добавляем только если фильтр прошли:
+                # Добавляем только если фильтр прошли.
+                # Сортировка не нужна: strace -ff пишет файл каждого PID
+                # хронологически, порядок чтения и есть порядок по ts.
                 if self.__syscall_filter.allow(syscall):
-                    proc.syscall.append(syscall)
+                    proc.sc_ts.append(syscall.ts)
+                    proc.sc_name.append(syscall.name)
+                    proc.sc_rv.append(syscall.returnvalue)
+                    proc.sc_args.append(syscall.args)
 
 #            print("ts:", v_timestamp, type(v_timestamp))
 #            print("exitcode:", v_exitcode)
 #            print("syscall:" , v_syscall)
 
-        proc.syscall.sort(key=lambda v: v.ts)
         return proc
 
 
@@ -817,36 +1143,80 @@ class StraceParser:
 # Обработка strace процессов
 #
 
+# Перечисление файлов трейса: os.scandir с проверкой префикса вместо
+# Path.glob - без Path и fnmatch на каждую запись каталога; через границу
+# пула уходят строки (меньше pickle на задачу).
+def _iter_trace_files(trace_dir):
+    with os.scandir(trace_dir) as it:
+        for entry in it:
+            if entry.name.startswith('trace-rpmbuild.'):
+                yield entry.path
+
+
+# Состояние для воркеров разбора трейсов: дочерние процессы fork-Pool
+# наследуют StraceData с его парсером через CoW, через канал пула ходят
+# только строки путей. Связанный метод в качестве callable не годится:
+# multiprocessing пересериализует его на каждую пачку задач, то есть
+# pickle всего self вместе с растущим по мере слияния proc_map.
+_PARSE_STATE : dict = { 'data': None }
+
+def _parse_trace_file(path : str):
+    return _PARSE_STATE['data'].do_file(path)
+
+
 class StraceData:
-    def __init__(self, syscall_filter: SysCallFilter, root_cwd : Path, files, parallel):
+    def __init__(self, syscall_filter: SysCallFilter, root_cwd : Path, files, parallel, preparsed : dict[int, ProcTrace] = None):
         self.root_cwd : Path                 = root_cwd;
         self.proc_map : dict[int, ProcTrace] = { }
         self.root_pid : int                  = None
 
+        # Трейсы, разобранные фоновым наблюдателем во время сборки
+        # (см. TraceWatcher), принимаются готовыми: их файлы пропускаются
+        # при разборе, слияние в proc_map - в конце __run.
+        self.__preparsed : dict[int, ProcTrace] = dict(preparsed) if preparsed else { }
+
         self.__syscall_filter: SysCallFilter = syscall_filter
         self.__strace_parser : StraceParser  = StraceParser(self.__syscall_filter)
         self.__parallel      : int           = parallel
 
         self.__run(files)
 
-    def __pid_from_path(self, path : Path) -> int:
-        return int(path.name.split('.', 1)[1])
+    def __pid_from_path(self, path : str) -> int:
+        return int(os.path.basename(path).split('.', 1)[1])
 
     def do_file(self, path):
         pid = self.__pid_from_path(path)
         return self.__strace_parser.parse_file(pid, path)
 
     def __run(self, files):
-        if self.__parallel > 1:
-            with multiprocessing.Pool(processes=self.__parallel) as pool:
-                results = pool.map(self.do_file, files)
-            for trace in results:
-                self.proc_map[trace.pid] = trace
+        # Уже разобранные наблюдателем файлы пропускаются.
+        files = [ f for f in files if self.__pid_from_path(f) not in self.__preparsed ]
+
+        # Трейсы per-PID (strace -ff) независимы, поэтому разбор
+        # распараллеливается по файлам; слияние в proc_map - в родителе.
+        if self.__parallel > 1 and len(files) > 0:
+            # Материализованный список нужен для расчета chunksize.
+            files_list = files
+            chunksize  = max(1, len(files_list) // (self.__parallel * 4))
+            _PARSE_STATE['data'] = self
+            try:
+                with multiprocessing.Pool(processes=self.__parallel) as pool:
+                    # imap_unordered: трейсы вливаются в proc_map по мере
+                    # готовности - без полного списка результатов в памяти
+                    # и без простоя ядер на "хвосте" из-за порядка выдачи.
+                    for trace in pool.imap_unordered(_parse_trace_file, files_list, chunksize=chunksize):
+                        self.proc_map[trace.pid] = trace
+            finally:
+                _PARSE_STATE['data'] = None
         else:
             for path in files:
                 trace = self.do_file(path)
                 self.proc_map[trace.pid] = trace
 
+        # Слияние готовых трейсов: их файлы уже отфильтрованы из списка.
+        self.proc_map.update(self.__preparsed)
+        self.__preparsed = { }
+
         if len(self.proc_map) == 0:
             raise ValueError("empty input file list")
 
@@ -855,12 +1225,93 @@ class StraceData:
 
 
 
+# Фоновый разбор трейсов параллельно со сборкой.
+#
+# strace -ff закрывает файл trace-rpmbuild.<pid> при выходе процесса,
+# поэтому IN_CLOSE_WRITE на каталоге strace означает "файл дописан" -
+# его можно разбирать, пока rpmbuild продолжает работать. Стадия
+# parse-strace тем самым перекрывается со стадией rpmbuild; файлы, не
+# разобранные к концу сборки, дочитываются обычным путем в StraceData.
+# inotify - через ctypes, без внешних зависимостей; если он недоступен,
+# наблюдатель просто не активируется.
+class TraceWatcher:
+    __IN_CLOSE_WRITE : Final[int] = 0x00000008
+
+    def __init__(self, trace_dir : Path, parser : StraceParser):
+        self.__trace_dir : Final[str]          = str(trace_dir)
+        self.__parser    : StraceParser        = parser
+        self.proc_map    : dict[int, ProcTrace] = {}
+
+        self.__fd     : int  = -1
+        self.__stop   : bool = False
+        self.__thread = None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self.__fd = libc.inotify_init()
+            if self.__fd < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_init')
+            if libc.inotify_add_watch(self.__fd, self.__trace_dir.encode(), TraceWatcher.__IN_CLOSE_WRITE) < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch')
+        except (OSError, AttributeError):
+            if self.__fd >= 0:
+                os.close(self.__fd)
+                self.__fd = -1
+            return
+
+        self.__thread = threading.Thread(target=self.__watch, daemon=True)
+        self.__thread.start()
+
+    def __drain(self):
+        buf = os.read(self.__fd, 65536)
+        offset = 0
+        while offset + 16 <= len(buf):
+            wd, mask, cookie, namelen = struct.unpack_from('iIII', buf, offset)
+            name = buf[offset + 16 : offset + 16 + namelen].rstrip(b'\0').decode()
+            offset += 16 + namelen
+
+            if not name.startswith('trace-rpmbuild.'):
+                continue
+            try:
+                pid = int(name.split('.', 1)[1])
+            except ValueError:
+                continue
+            self.proc_map[pid] = self.__parser.parse_file(pid, os.path.join(self.__trace_dir, name))
+
+    def __watch(self):
+        # Главный поток ждет завершения rpmbuild в proc.wait() - GIL
+        # свободен, разбор идет параллельно со сборкой.
+        while not self.__stop:
+            r, _, _ = select.select([ self.__fd ], [], [], 0.5)
+            if r:
+                self.__drain()
+
+    # Останов наблюдателя: дочитывает накопившиеся события и возвращает
+    # карту уже разобранных трейсов.
+    def stop(self) -> dict[int, ProcTrace]:
+        if self.__thread is not None:
+            self.__stop = True
+            self.__thread.join()
+            while select.select([ self.__fd ], [], [], 0)[0]:
+                self.__drain()
+            self.__thread = None
+        if self.__fd >= 0:
+            os.close(self.__fd)
+            self.__fd = -1
+        return self.proc_map
+
+
 @dataclass
 class CompilerCall:
     pid       : int
     exitcode  : int
     command   : CompilerCommand
     open_files: list[Any] = dataclasses.field(default_factory=list)
+    # Ключ для счетчиков префильтра: as_tuple() пересобирает кортеж при
+    # каждом вызове, поэтому вычисляется один раз при создании.
+    cmd_tuple : tuple     = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.cmd_tuple = self.command.as_tuple()
 
 
 class CompilerExtractor:
@@ -883,75 +1334,117 @@ class CompilerExtractor:
 #        strprefix : Final = '-' * (level+1)
 #        print(strprefix, "proc:", pid, "cwd:", cwd, type(cwd))
 
-        proc = self.__strace_data.proc_map[pid]
-
-        compiler_call : CompilerCall = None
-        open_files    : list[Any]    = [];
-
-        for sc in proc.syscall:
-            if sc.name in CompilerExtractor.__fork_syscall_set:
-                next_pid : int = sc.returnvalue
-                if next_pid in self.__strace_data.proc_map:
-                    open_files = open_files + self.__walk_proc(next_pid, cwd, is_compiler_internals, level + 1);
-            elif sc.name == 'fchdir':
-                new_cwd = cwd / Path(sc.args[0][1])
-#                print(strprefix, "proc:", pid, "cwd:", cwd, "fchdir", sc.args[0][1], new_cwd)
-                cwd = new_cwd
-            elif sc.name == 'chdir':
-                new_cwd = cwd / Path(sc.args[0])
-#                print(strprefix, "proc:", pid, "cwd:", cwd, "chdir", sc.args[0], new_cwd)
-                cwd = new_cwd
-            elif sc.name == 'execve':
-#                # Проверка на соответствие пути в ENV. Не гарантируется его наличие.
-#                env = sc.args[2]
-#                if isinstance(env, list):
-#                    for e in env:
-#                        if e.startswith('PWD='):
-#                            env_pwd = Path(e.removeprefix('PWD='))
-#                            if env_pwd != cwd:
-#                                print("ERROR: invalid cwd '{}' != '{}'".format(env_pwd, cwd))
-
-                # НА ПУТИ ВНИЗ по дереву ловим только первый компилятор и все открытые в дочерних процессах файлы складываем к нему.
-                # Нам не важно, что там компилятор вызывает внутри, нам важны открытые файлы.
-                if is_compiler_internals == False:
-                    executable = sc.args[0]
-                    compiler_id = self.__compiler_matcher.match(executable, sc.args[1])
-                    if compiler_id is not None:
-                        is_compiler_internals = True
-                        compiler_call = CompilerCall(proc.pid, proc.exitcode, CompilerCommand(cwd, compiler_id, executable, copy.deepcopy(sc.args[1])))
-            elif sc.name == 'execveat':
-                # TODO: Реализовать обработку execveat
-                raise NotImplementedError('Implement syscall processing: execveat')
-            elif sc.name == 'open':
-                if is_compiler_internals:
-                    # Только существующие файлы, которые получилось открыть.
-                    if sc.returnvalue >= 0:
-                        open_files.append( (cwd, sc.args) )
-
-            elif sc.name == 'openat':
-                if is_compiler_internals:
-                    # Только существующие файлы, которые получилось открыть.
-                    if sc.returnvalue >= 0:
-                        sc_cwd = sc.args[0][1]
-                        if sc_cwd is None:
-                            sc_cwd = cwd
-                        open_files.append( (Path(sc_cwd), sc.args[1:]) )
-
-            elif sc.name == 'openat2':
-                if is_compiler_internals:
-                    # Только существующие файлы, которые получилось открыть.
-                    if sc.returnvalue >= 0:
-                        sc_cwd = sc.args[0][1]
-                        if sc_cwd is None:
-                            sc_cwd = cwd
-                        open_files.append( (Path(sc_cwd), [ sc.args[1], sc.args[2]['flags'],  sc.args[2]['mode'] ]) )
-
-        if compiler_call is not None:
-            compiler_call.open_files = open_files
-            self.__compiler_calls.append(compiler_call)
-            open_files = list() # Нет смысла прокидывать список выше - обнуляем.
-
-        return open_files
+        proc_map = self.__strace_data.proc_map
+
+        # Обход дерева процессов явным стеком вместо рекурсии: глубина
+        # дерева сборки не ограничена лимитом интерпретатора, а списки
+        # открытых файлов дочерних кадров вливаются в родительский через
+        # extend - амортизированный O(n) вместо O(n^2) конкатенаций.
+        # Внутри цикла cwd - обычная строка: конструктор Path на порядок
+        # дороже os.path.join, а вызовов - по одному на каждый chdir/open.
+        # Path строится только на границах (CompilerCall, копирование).
+        # Кадр - изменяемый список:
+        #   [proc, cwd, is_compiler_internals, позиция в колонках,
+        #    compiler_call, open_files, open_files родителя]
+        root_frame = [ proc_map[pid], str(cwd), is_compiler_internals, 0, None, [], None ]
+        stack = [ root_frame ]
+        while stack:
+            frame = stack[-1]
+            proc, cwd, is_compiler_internals, i, compiler_call, open_files, parent_files = frame
+
+            sc_name_col = proc.sc_name
+            sc_rv_col   = proc.sc_rv
+            sc_args_col = proc.sc_args
+            n           = len(sc_name_col)
+
+            paused = False
+            # Итерация по колонкам SoA-раскладки - без материализации SysCallEntity.
+            while i < n:
+                sc_name = sc_name_col[i]
+                sc_rv   = sc_rv_col[i]
+                sc_args = sc_args_col[i]
+                i += 1
+                if sc_name in CompilerExtractor.__fork_syscall_set:
+                    next_pid : int = sc_rv
+                    if next_pid in proc_map:
+                        # Приостановка кадра: состояние - обратно в стек,
+                        # сверху кладется кадр дочернего процесса.
+                        frame[1] = cwd
+                        frame[2] = is_compiler_internals
+                        frame[3] = i
+                        frame[4] = compiler_call
+                        stack.append([ proc_map[next_pid], cwd, is_compiler_internals, 0, None, [], open_files ])
+                        paused = True
+                        break
+                elif sc_name == 'fchdir':
+                    new_cwd = os.path.join(cwd, sc_args[0][1])
+#                    print(strprefix, "proc:", pid, "cwd:", cwd, "fchdir", sc_args[0][1], new_cwd)
+                    cwd = new_cwd
+                elif sc_name == 'chdir':
+                    new_cwd = os.path.join(cwd, sc_args[0])
+#                    print(strprefix, "proc:", pid, "cwd:", cwd, "chdir", sc_args[0], new_cwd)
+                    cwd = new_cwd
+                elif sc_name == 'execve':
+#                    # Проверка на соответствие пути в ENV. Не гарантируется его наличие.
+#                    env = sc_args[2]
+#                    if isinstance(env, list):
+#                        for e in env:
+#                            if e.startswith('PWD='):
+#                                env_pwd = Path(e.removeprefix('PWD='))
+#                                if env_pwd != cwd:
+#                                    print("ERROR: invalid cwd '{}' != '{}'".format(env_pwd, cwd))
+
+                    # НА ПУТИ ВНИЗ по дереву ловим только первый компилятор и все открытые в дочерних процессах файлы складываем к нему.
+                    # Нам не важно, что там компилятор вызывает внутри, нам важны открытые файлы.
+                    if is_compiler_internals == False:
+                        executable = sc_args[0]
+                        compiler_id = self.__compiler_matcher.match(executable, sc_args[1])
+                        if compiler_id is not None:
+                            is_compiler_internals = True
+                            compiler_call = CompilerCall(proc.pid, proc.exitcode, CompilerCommand(Path(cwd), compiler_id, executable, tuple(sc_args[1])))
+                elif sc_name == 'execveat':
+                    # TODO: Реализовать обработку execveat
+                    raise NotImplementedError('Implement syscall processing: execveat')
+                elif sc_name == 'open':
+                    if is_compiler_internals:
+                        # Только существующие файлы, которые получилось открыть.
+                        if sc_rv >= 0:
+                            open_files.append( (cwd, sc_args) )
+
+                elif sc_name == 'openat':
+                    if is_compiler_internals:
+                        # Только существующие файлы, которые получилось открыть.
+                        if sc_rv >= 0:
+                            sc_cwd = sc_args[0][1]
+                            if sc_cwd is None:
+                                sc_cwd = cwd
+                            open_files.append( (sc_cwd, sc_args[1:]) )
+
+                elif sc_name == 'openat2':
+                    if is_compiler_internals:
+                        # Только существующие файлы, которые получилось открыть.
+                        if sc_rv >= 0:
+                            sc_cwd = sc_args[0][1]
+                            if sc_cwd is None:
+                                sc_cwd = cwd
+                            open_files.append( (sc_cwd, [ sc_args[1], sc_args[2]['flags'],  sc_args[2]['mode'] ]) )
+
+            if paused:
+                continue
+
+            # Кадр обработан до конца: найденный компилятор забирает свои
+            # открытые файлы, остальное вливается в родительский кадр.
+            if compiler_call is not None:
+                compiler_call.open_files = open_files
+                self.__compiler_calls.append(compiler_call)
+                open_files = list() # Нет смысла прокидывать список выше - обнуляем.
+                frame[5] = open_files
+
+            if parent_files is not None:
+                parent_files.extend(open_files)
+            stack.pop()
+
+        return root_frame[5]
 
 
 
@@ -976,7 +1469,8 @@ class ResultEncoder(json.JSONEncoder):
         if isinstance(obj, Path):
             return str(obj)
         if isinstance(obj, CompilerCommand):
-            return obj.__dict__
+            # CompilerCommand со slots не имеет __dict__
+            return { f.name: getattr(obj, f.name) for f in dataclasses.fields(obj) }
         if isinstance(obj, CompilerId):
             return obj.to_json_dict()
         if isinstance(obj, SourceFileCompilerMetadata):
@@ -989,6 +1483,17 @@ class ResultEncoder(json.JSONEncoder):
 # Работа
 #
 
+# Состояние для воркеров препроцессирования: дочерние процессы fork-Pool
+# наследуют трассировщик и список вызовов компилятора через CoW, а через
+# канал пула ходят только целочисленные индексы - без pickle каждого
+# CompilerCall с его списком открытых файлов.
+_PREPROCESS_STATE : dict = { 'tracer': None, 'calls': None }
+
+def _preprocess_call_index(idx : int):
+    state = _PREPROCESS_STATE
+    return state['tracer'].do_preprocess_compiler_call(state['calls'][idx])
+
+
 class RpmbuildTracer:
     class Stages:
         def __init__(self, arg):
@@ -1007,9 +1512,20 @@ class RpmbuildTracer:
         self.__srpm_name : str         = None if self.__stage.rpmbuild else os.environ.get('BUILD_TRACER_SRPM_NAME')
         self.__parallel  : Final[int]  = max(int(os.environ.get('BUILD_TRACER_PARALLEL', os.environ.get('RPM_BUILD_NCPUS', '1'))), 1)
 
-        self.__compiler_matcher  : CompilerMatcher = CompilerMatcher()
+        # Кеш идентификации компиляторов - в корне каталога результатов:
+        # один и тот же набор компиляторов переиспользуется между пакетами.
+        self.__compiler_matcher  : CompilerMatcher = CompilerMatcher(self.__output_dir)
         self.__open_files_filter : OpenFilesFilter = OpenFilesFilter()
 
+        # Уже скопированные в output_dir/root файлы: ключ
+        # (dev, ino, mtime, путь) - популярные заголовки открываются
+        # тысячами TU, на каждый путь копия нужна одна; путь в ключе -
+        # чтобы жесткие ссылки материализовались под каждым из своих имен.
+        self.__copied_files : set[tuple[int, int, int, str]] = set()
+
+        # Трейсы, разобранные наблюдателем во время сборки (см. TraceWatcher)
+        self.__preparsed_traces : dict[int, ProcTrace] = {}
+
         # --------------
         # Таймер: отсечка инициализаци
         self.timer.cut('init')
@@ -1147,6 +1663,11 @@ class RpmbuildTracer:
         # ------------------------------
         # Аргументы strace
         #
+        # Файлы per-PID (-ff) вместо потоковой выдачи в pipe - осознанно:
+        # сохраненные трейсы позволяют перезапускать стадию preprocessing
+        # без пересборки (BUILD_TRACER_STAGE=preprocessing +
+        # BUILD_TRACER_SRPM_NAME), а разбор и так параллелится по файлам.
+        #
         strace_args : Final[list[str]] = [
             '-xx'       , # so strings are escaped
             '--absolute-timestamps=format:unix,precision:ns', # unix timestamp with nanosecond
@@ -1157,6 +1678,9 @@ class RpmbuildTracer:
             '--no-abbrev'           ,
             '-e', 'trace=fork,vfork,clone,?clone2,?clone3,execve,?execveat,chdir,fchdir,?open,?openat,?openat2',
             '-z', # print only syscalls that returned without an error code (--successful-only)
+            # seccomp-BPF: ptrace-остановка только на перечисленных в -e
+            # syscall'ах, остальные бегут без участия трассировщика -
+            # основной способ снизить накладные расходы strace.
             '--seccomp-bpf',
         ]
 
@@ -1192,6 +1716,11 @@ class RpmbuildTracer:
         # Создание выходного каталога для strace
         Path(self.output_dir / 'strace').mkdir(mode=0o755, parents=True, exist_ok=True)
 
+        # --------------
+        # Фоновый разбор закрытых файлов трейса параллельно со сборкой -
+        # только если стадия preprocessing вообще будет выполняться.
+        trace_watcher = TraceWatcher(self.output_dir / 'strace', StraceParser(SysCallFilter())) if self.__stage.preprocessing else None
+
 
         # --------------
 
@@ -1213,6 +1742,9 @@ class RpmbuildTracer:
 
         returncode = self.__exec_rpmbuild(run_command)
 
+        if trace_watcher is not None:
+            self.__preparsed_traces = trace_watcher.stop()
+
         # --------------
         # Запись кода возврата rpmbuild
 
@@ -1254,9 +1786,39 @@ class RpmbuildTracer:
         self.__print("PREPROCESSED(" + msg + ")[" + str(pid) + "]:", command)
 
 
+    # reflink (ioctl FICLONE): клонирование содержимого файла на xfs/btrfs -
+    # O(1) операция над метаданными, данные не копируются вовсе.
+    __FICLONE : Final[int] = 0x40049409
+
+    @staticmethod
+    def __clone_or_copy(copy_src, copy_dst):
+        # Копирование без прохода данных через userspace: reflink на
+        # поддерживающих ФС, иначе sendfile (данные остаются в ядре);
+        # shutil.copyfileobj - последний резерв. Права и времена
+        # переносятся как у shutil.copy2.
+        with open(copy_src, 'rb') as fsrc, open(copy_dst, 'wb') as fdst:
+            st = os.fstat(fsrc.fileno())
+            try:
+                fcntl.ioctl(fdst.fileno(), RpmbuildTracer.__FICLONE, fsrc.fileno())
+            except OSError:
+                try:
+                    offset = 0
+                    while offset < st.st_size:
+                        sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, st.st_size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                except OSError:
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+                    shutil.copyfileobj(fsrc, fdst)
+            os.fchmod(fdst.fileno(), st.st_mode & 0o7777)
+        os.utime(copy_dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
     def __atomic_file_copy(self, copy_src, copy_dst):
         copy_dst_pp = copy_dst.with_suffix(copy_dst.suffix + '.' + str(os.getpid()))
-        shutil.copy2(copy_src, copy_dst_pp, follow_symlinks=True)
+        RpmbuildTracer.__clone_or_copy(copy_src, copy_dst_pp)
         copy_dst_pp.rename(copy_dst)
 
 
@@ -1264,7 +1826,7 @@ class RpmbuildTracer:
         counters = Counter()
 
         for cc in compiler_calls:
-            counters[cc.command.as_tuple()] += 1
+            counters[cc.cmd_tuple] += 1
 
         for cc in compiler_calls:
             # Если код завершения не равен 0, то вызов был неудачный
@@ -1279,7 +1841,7 @@ class RpmbuildTracer:
 
             # Дубликаты - это скорее всего проверки configure, cmake, и т.д.
             # Если компилятор вызывается с одними и теми же параметрами - удалять целиком.
-            if (cnt := counters[cc.command.as_tuple()]) > 1:
+            if (cnt := counters[cc.cmd_tuple]) > 1:
                 self.__print_ignored(cc.pid, cc.command, "multipe calls " + str(cnt))
                 continue
 
@@ -1301,17 +1863,18 @@ class RpmbuildTracer:
             return []
 
 
-        # Игнорирование внутрянки CMake
-        #   CMakeFiles/3.27.6/CompilerIdCXX/{CMakeCXXCompilerId.cpp,a.out,tmp}
+        # Игнорирование внутрянки CMake (см. _CMAKE_INTERNAL_SOURCES);
+        # rpartition вместо os.path.basename - без логики os.sep.
         for source in sources_in_args:
-            if os.path.basename(source) in ['CMakeCCompilerId.c', 'CMakeCXXCompilerId.cpp']:
+            if source.rpartition('/')[2] in _CMAKE_INTERNAL_SOURCES:
                 self.__print_ignored(cc.pid, cc.command, "CMake internal source")
                 return []
 
 
         # Копирование исходных файлов.
         for of in cc.open_files:
-            copy_src = of[0] / of[1][0]
+            # of[0] - строка (см. __walk_proc); Path строится один раз на файл.
+            copy_src = Path(os.path.join(of[0], of[1][0]))
             copy_dst = self.output_dir / 'root' / Path(*copy_src.parts[1:])
 
             # Файл должен существовать.
@@ -1324,7 +1887,22 @@ class RpmbuildTracer:
 
             # Копируем только те файлы, которые открывались для чтения
             # (объектные файлы, результаты, выходные бинарики открываются для записи).
-            if 'O_RDONLY' not in of[1][1].split("|"):
+            # Флаги хранятся битовой маской (см. _oflags_to_bits).
+            if (of[1][1] & os.O_ACCMODE) != os.O_RDONLY:
+                continue
+
+            # Дедупликация: каждая пара inode/путь назначения копируется
+            # один раз. Путь входит в ключ: один inode может открываться
+            # по разным путям (жесткие ссылки), и каждый путь должен
+            # материализоваться под output_dir/root. При parallel > 1
+            # набор свой у каждого воркера - возможны редкие повторные
+            # копии между воркерами, копирование атомарно и это безопасно.
+            try:
+                st = copy_src.stat()
+            except OSError:
+                continue
+            copied_key = (st.st_dev, st.st_ino, st.st_mtime_ns, str(copy_src))
+            if copied_key in self.__copied_files:
                 continue
 
             #print("\t\tCopy:", copy_src, " -> ", copy_dst, flush=True)
@@ -1332,6 +1910,7 @@ class RpmbuildTracer:
                 if copy_src.exists():
                     copy_dst.parent.mkdir(mode=0o755, parents=True, exist_ok=True)
                     self.__atomic_file_copy(copy_src, copy_dst)
+                    self.__copied_files.add(copied_key)
             except Exception:
                 pass
 
@@ -1345,23 +1924,11 @@ class RpmbuildTracer:
 
 
     def __do_preprocess_compiler_call_processing_source(self, cc, source_idx, sources_in_args):
-        # Генерация хэша для имени препроцессированного файла
-        h = hashlib.sha256()
-        h.update(str(cc.command.cwd).encode())
-        h.update(b'\x00')
-        h.update(cc.command.compiler.id.encode())
-        h.update(b'\x00')
-        if cc.command.compiler.like:
-            h.update(cc.command.compiler.like.encode())
-        h.update(b'\x00')
-        h.update(str(cc.command.executable).encode())
-        h.update(b'\x00')
-        for a in cc.command.args:
-            h.update(a.encode())
-            h.update(b'\x00')
-        h.update(b'\x00\x00')
-        h.update(sources_in_args[source_idx].encode())
-        h.update(b'\x00\x00')
+        # Генерация хэша для имени препроцессированного файла:
+        # префикс команды уже прохеширован в кешированном объекте,
+        # здесь остается copy() и дохеширование имени исходника.
+        h = _command_hash_prefix(cc.command).copy()
+        h.update(sources_in_args[source_idx].encode() + b'\x00\x00')
 
         cc_hash = h.hexdigest()
 
@@ -1392,6 +1959,12 @@ class RpmbuildTracer:
 
         # Генерация препроцессированных файлов
         # Необходимо использовать Popen для возможности привязки sys.stdin, sys.stdout, sys.stderr
+        #
+        # Запуск по процессу на исходник - осознанно: у gcc/lcc нет режима
+        # долгоживущего сервера, а пакетирование нескольких исходников в
+        # один вызов '-E' несовместимо с '-o <hash>.i' на каждый файл и
+        # смешивает диагностику; стоимость fork+exec прячется параллелизмом
+        # пула препроцессирования.
         proc = subprocess.Popen(
             preprocessed_command.args, executable=preprocessed_command.executable,
             stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
@@ -1413,7 +1986,9 @@ class RpmbuildTracer:
                 preprocessed_result_file,
                 sources_in_args[source_idx],
                 self.__compiler_matcher.get_source_metadata(cc.command, sources_in_args[source_idx]),
-                copy.deepcopy(cc.command)
+                # CompilerCommand заморожен (frozen, кортеж аргументов) -
+                # разделяемая ссылка безопасна, deepcopy не нужен.
+                cc.command
             )
 
         self.__print_preprocessed(cc.pid, cc.command, preprocessed_status_msg)
@@ -1421,17 +1996,29 @@ class RpmbuildTracer:
 
 
     def __do_preprocessing_compiler_calls(self, compiler_calls_generator) -> list[ResultItem]:
+        results : list[ResultItem] = list()
+
         if self.__parallel > 1:
-            with multiprocessing.Pool(processes=self.__parallel) as pool:
-                all_results = pool.map(self.do_preprocess_compiler_call, compiler_calls_generator)
+            # Стоимость задач сильно разнится (препроцессор на каждый вызов);
+            # LPT-планирование - длинные задачи (по числу открытых файлов)
+            # раздаются первыми, "хвост" из коротких выравнивает загрузку.
+            calls_list = sorted(compiler_calls_generator, key=lambda cc: -len(cc.open_files))
+            chunksize  = max(1, len(calls_list) // (self.__parallel * 8))
+            _PREPROCESS_STATE['tracer'] = self
+            _PREPROCESS_STATE['calls']  = calls_list
+            try:
+                with multiprocessing.Pool(processes=self.__parallel) as pool:
+                    for rr in pool.imap_unordered(_preprocess_call_index, range(len(calls_list)), chunksize=chunksize):
+                        if rr:
+                            results.extend(rr)
+            finally:
+                _PREPROCESS_STATE['tracer'] = None
+                _PREPROCESS_STATE['calls']  = None
         else:
-            all_results = (self.do_preprocess_compiler_call(cc) for cc in compiler_calls_generator)
-
-        results : list[ResultItem] = list()
-        for rr in all_results:
-            if rr is None:
-                continue
-            results.extend(rr)
+            for cc in compiler_calls_generator:
+                rr = self.do_preprocess_compiler_call(cc)
+                if rr:
+                    results.extend(rr)
 
         return results
 
@@ -1445,8 +2032,9 @@ class RpmbuildTracer:
             StraceData(
                 SysCallFilter(),
                 rpmbuild_cwd,
-                Path(self.output_dir / 'strace').glob('trace-rpmbuild.*'),
-                self.__parallel
+                _iter_trace_files(self.output_dir / 'strace'),
+                self.__parallel,
+                preparsed=self.__preparsed_traces
             ),
             self.__compiler_matcher
         )
@@ -1471,8 +2059,16 @@ class RpmbuildTracer:
 
         self.__print("WRITE-RESULT-START--------------")
 
-        with (self.output_dir / 'result.json').open('w') as f:
-            json.dump(results, f, cls=ResultEncoder, indent=4)
+        if orjson is not None:
+            # orjson вызывает default для незнакомых типов так же, как
+            # стандартный encoder; PASSTHROUGH_DATACLASS - чтобы dataclass'ы
+            # шли через default, а не через встроенную сериализацию
+            # (иначе CompilerId обойдет to_json_dict и формат "поплывет").
+            with (self.output_dir / 'result.json').open('wb') as f:
+                f.write(orjson.dumps(results, default=ResultEncoder().default, option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS))
+        else:
+            with (self.output_dir / 'result.json').open('w') as f:
+                json.dump(results, f, cls=ResultEncoder, indent=4)
 
         self.__print("WRITE-RESULT-END----------------")
         self.timer.cut('write-result')
@@ -17,17 +17,156 @@
  */
 
 #include <errno.h>
+#include <fcntl.h>
 #include <stdio.h>
+#include <stdlib.h>
 #include <string.h>
 #include <unistd.h>
 
+#include <sys/types.h>
+#include <sys/wait.h>
+
+/*
+ * Режим --serve: долгоживущий воркер (обычно внутри chroot).
+ *
+ * Из stdin читаются задания: последовательность полей, разделенных '\0'.
+ * Первое поле - рабочий каталог, остальные - argv команды, пустое поле
+ * завершает задание. На каждое задание выполняется fork + chdir + execvp,
+ * после завершения команды в stdout печатается строка
+ * "CHEXEC: status=<код возврата>" (сигнал N дает код 128+N).
+ * Перед строкой выводится '\n', чтобы статус не склеился с выводом
+ * команды, не завершенным переводом строки.
+ * EOF на stdin - нормальное завершение воркера.
+ *
+ * Позволяет не платить за цепочку запусков chroot+chexec на каждую команду.
+ */
+static int serve (void)
+{
+    char   *buf   = NULL;
+    size_t  bufsz = 0;
+
+    for (;;)
+    {
+        char   *cwd    = NULL;
+        char  **args   = NULL;
+        size_t  argn   = 0;
+        size_t  argcap = 0;
+        size_t  i;
+        int     status = -1;
+
+        /* Чтение полей задания до пустого поля */
+        for (;;)
+        {
+            ssize_t len = getdelim(&buf, &bufsz, '\0', stdin);
+            if (len < 0)
+            {
+                /* EOF между заданиями - нормальное завершение */
+                if (cwd == NULL && argn == 0)
+                {
+                    free(buf);
+                    return 0;
+                }
+                fputs("chexec: unexpected EOF in job\n", stderr);
+                return 4;
+            }
+
+            if (buf[0] == '\0')
+                break;
+
+            if (cwd == NULL)
+            {
+                cwd = strdup(buf);
+            }
+            else
+            {
+                if (argn + 2 > argcap)
+                {
+                    argcap = argcap ? argcap * 2 : 16;
+                    args = realloc(args, argcap * sizeof(char *));
+                    if (args == NULL)
+                    {
+                        fputs("chexec: out of memory\n", stderr);
+                        return 5;
+                    }
+                }
+                args[argn++] = strdup(buf);
+            }
+        }
+
+        if (cwd == NULL || argn == 0)
+        {
+            fputs("chexec: empty job\n", stderr);
+        }
+        else
+        {
+            pid_t pid;
+
+            args[argn] = NULL;
+            fflush(NULL);
+
+            pid = fork();
+            if (pid == 0)
+            {
+                /* stdin потомка - канал подачи заданий; команда, читающая
+                 * stdin, зависла бы на нем вместо EOF. Перенаправление
+                 * в /dev/null сохраняет контракт одиночного запуска
+                 * (stdin=devnull). */
+                int devnull = open("/dev/null", O_RDONLY);
+                if (devnull >= 0)
+                {
+                    dup2(devnull, STDIN_FILENO);
+                    if (devnull != STDIN_FILENO)
+                        close(devnull);
+                }
+                if (chdir(cwd) < 0)
+                {
+                    fprintf(stderr, "cd: %s: %s\n", cwd, strerror(errno));
+                    _exit(125);
+                }
+                execvp(args[0], args);
+                fprintf(stderr, "exec: %s: %s\n", args[0], strerror(errno));
+                _exit(126);
+            }
+            else if (pid > 0)
+            {
+                int wstatus;
+                if (waitpid(pid, &wstatus, 0) == pid)
+                {
+                    if (WIFEXITED(wstatus))
+                        status = WEXITSTATUS(wstatus);
+                    else if (WIFSIGNALED(wstatus))
+                        status = 128 + WTERMSIG(wstatus);
+                }
+            }
+            else
+            {
+                fprintf(stderr, "fork: %s\n", strerror(errno));
+            }
+        }
+
+        for (i = 0; i < argn; i++)
+            free(args[i]);
+        free(args);
+        free(cwd);
+
+        printf("\nCHEXEC: status=%d\n", status);
+        fflush(stdout);
+    }
+}
+
 int main (int argc, char *argv[])
 {
     int r;
 
+    if (argc == 2 && strcmp(argv[1], "--serve") == 0)
+    {
+        return serve();
+    }
+
     if (argc < 3)
     {
-        fputs("chexec NEWWD COMMAND [ARG]...\n", stderr);
+        fputs("chexec NEWWD COMMAND [ARG]...\n"
+              "chexec --serve\n", stderr);
         return 1;
     }
 